@@ -0,0 +1,41 @@
+"""Add partial index on active user_sessions
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Refresh lookups only ever match unrevoked sessions; the partial index
+    # skips revoked rows and covers user_id/expires_at for index-only scans.
+    # Built concurrently so the login path isn't blocked on a write lock.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_sessions_active_hash",
+            "user_sessions",
+            ["token_hash"],
+            unique=False,
+            postgresql_include=["user_id", "expires_at"],
+            postgresql_where=sa.text("revoked_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_sessions_active_hash",
+            table_name="user_sessions",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,40 @@
+"""Add text_pattern_ops index on users.username
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Username allocation matches "<base>\_%" with LIKE. Under a non-C
+    # collation the default btree index can't serve prefix matches, so add
+    # a text_pattern_ops index for them. It is built concurrently so OAuth
+    # callbacks aren't blocked on a write lock.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_username_pattern",
+            "users",
+            ["username"],
+            unique=False,
+            postgresql_ops={"username": "text_pattern_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_username_pattern",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,73 @@
+"""
+Circuit breaker for LLM providers
+
+Stops sending requests to a provider that keeps failing after retries, so an
+outage costs callers an immediate fallback instead of a full retry cycle each.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a timed half-open probe.
+
+    After ``fail_max`` consecutive failures the circuit opens and requests
+    are rejected for ``reset_timeout`` seconds. Then requests are let
+    through again (half-open): one success closes the circuit, one failure
+    re-opens it for another ``reset_timeout``.
+    """
+
+    def __init__(self, fail_max: int, reset_timeout: float):
+        if fail_max <= 0 or reset_timeout <= 0:
+            raise ValueError("fail_max and reset_timeout must be positive")
+        self.fail_max = int(fail_max)
+        self.reset_timeout = float(reset_timeout)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return (
+            self._opened_at is not None
+            and time.monotonic() - self._opened_at < self.reset_timeout
+        )
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        return not self.is_open
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self.fail_max:
+            # Trip, or re-open after a failed half-open probe
+            self._opened_at = time.monotonic()
+
+
+_breakers: Dict[Tuple[str, int, float], CircuitBreaker] = {}
+
+
+def get_circuit_breaker(
+    name: str,
+    fail_max: int = 0,
+    reset_timeout: float = 0.0,
+) -> Optional[CircuitBreaker]:
+    """Return the process-wide breaker for ``name`` or None if disabled.
+
+    Breakers are shared between service instances so that every caller of
+    the same provider sees the same circuit state.
+    """
+    if fail_max <= 0 or reset_timeout <= 0:
+        return None
+    key = (name, fail_max, reset_timeout)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        breaker = _breakers[key] = CircuitBreaker(fail_max, reset_timeout)
+    return breaker
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any
 
-from .groq_service import GroqService
+from .groq_service import GroqService, get_groq_service
 from src.server.features.demo_analyzer.models import (
     CoachReport,
     DemoAnalysisInput,
@@ -27,7 +27,8 @@ class DemoCoachModel:
         """
         self.model_name = model_name or "demo_coach_default"
         self._client: Any | None = None
-        self._service = GroqService(api_key=kwargs.get("api_key"))
+        api_key = kwargs.get("api_key")
+        self._service = GroqService(api_key=api_key) if api_key else get_groq_service()
 
     async def generate_coach_report(
         self,
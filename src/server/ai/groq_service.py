@@ -2,21 +2,625 @@
 Groq Integration Service
 Service for Groq AI models
 """
-from typing import Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+import asyncio
+import copy
+from functools import lru_cache
+import hashlib
 import logging
+import random
+import re
+import sys
 from urllib.parse import urlparse
-import aiohttp
+import httpx
 import json
+from pydantic import ValidationError
 from ..config.settings import settings
-from .sample_store import append_sample
+from ..core import fast_json
+from ..core.memory_cache import TTLCache
+from .circuit_breaker import CircuitOpenError, get_circuit_breaker
+from .sample_store import enqueue_sample_line
+from .schemas import (
+    DemoCoachReportReply,
+    LLMReply,
+    TeammateScoreReply,
+    TrainingPlanReply,
+)
+from .token_bucket import ModelRateLimiter, get_model_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # h2 is optional, fall back to pooled HTTP/1.1
+    HTTP2_AVAILABLE = False
+
+
+def _estimate_tokens(text: str) -> int:
+    """Approximate prompt size in tokens (~4 characters per token).
+
+    A heuristic rather than a real tokenizer: it needs no optional
+    dependency or downloaded vocabulary, so budgets are the same in every
+    environment.
+    """
+    return len(text) // 4 + 1
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(
+            float(getattr(settings, "GROQ_TIMEOUT", 60.0) or 60.0),
+            connect=10.0,
+        ),
+        limits=httpx.Limits(
+            max_connections=200,
+            max_keepalive_connections=64,
+            keepalive_expiry=60.0,
+        ),
+    )
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide LLM HTTP client for the running event loop.
+
+    A single pooled client keeps TLS connections to the provider alive
+    between requests (and multiplexes them over HTTP/2 when available).
+    The client is recreated if the event loop changed, e.g. between test
+    cases or bot restarts.
+    """
+    global _http_client, _http_client_loop
+
+    loop = asyncio.get_running_loop()
+    if (
+        _http_client is None
+        or _http_client.is_closed
+        or _http_client_loop is not loop
+    ):
+        _http_client = _build_http_client()
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared LLM HTTP client (called on application shutdown)."""
+    global _http_client, _http_client_loop
+
+    client = _http_client
+    _http_client = None
+    _http_client_loop = None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+# Completed analyses/plans keyed by a hash of their (quantized) inputs, so a
+# dashboard refresh with unchanged stats does not hit the provider again.
+_response_cache: TTLCache = TTLCache(maxsize=2048, ttl=3600)
+
+
+def _quantize(value: Any) -> Any:
+    """Round floats so that stats equal to 2 decimals share a cache entry."""
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {str(k): _quantize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_quantize(v) for v in value]
+    return value
+
+
+def _cache_key(*parts: Any) -> str:
+    canonical = fast_json.dumps_bytes(_quantize(parts), sort_keys=True)
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+T = TypeVar("T")
+
+# Requests currently in flight, keyed like _response_cache. Concurrent
+# callers asking for the same thing await one shared upstream call.
+_inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+
+async def _single_flight(key: str, factory: Callable[[], Awaitable[T]]) -> T:
+    """Run ``factory`` once per key among concurrent callers.
+
+    The work runs in its own task and every caller awaits it through
+    ``asyncio.shield``, so cancelling one caller (e.g. a client
+    disconnect) does not cancel the request the others are waiting for.
+    """
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(key)
+    if task is None or task.done() or task.get_loop() is not loop:
+        task = loop.create_task(factory())
+        _inflight[key] = task
+
+        def _forget(done: "asyncio.Task[Any]") -> None:
+            if _inflight.get(key) is done:
+                del _inflight[key]
+
+        task.add_done_callback(_forget)
+    return await asyncio.shield(task)
+
+
+# Statuses worth retrying: request timeout, rate limit and transient 5xx
+_RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+_RETRY_MAX_DELAY = 8.0
+_RETRY_AFTER_MAX = 30.0
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a delta-seconds Retry-After header value (HTTP dates are ignored)."""
+    if not value:
+        return None
+    try:
+        return min(max(float(value), 0.0), _RETRY_AFTER_MAX)
+    except ValueError:
+        return None
+
+
+# Placeholder swapped for the JSON-encoded user message in cached bodies
+_USER_CONTENT_MARKER = "\x00user-content\x00"
+
+# Markdown code fence lines (```json, ```) that models like to wrap JSON in
+_FENCE_RE = re.compile(r"^[ \t]*```[a-zA-Z]*[ \t]*$", re.MULTILINE)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_json_object(content: str) -> Optional[Dict]:
+    """Extract the first JSON object from a model reply.
+
+    Strips optional markdown fences in one regex pass and decodes the first
+    balanced object starting at the first ``{`` with a single raw_decode,
+    ignoring any trailing text. Returns None if no object can be parsed.
+    Replies without fences (the norm in JSON mode) skip the regex entirely,
+    and a reply that is exactly one object is parsed with fast_json.
+    """
+    text = _FENCE_RE.sub("", content) if "```" in content else content
+    start = text.find("{")
+    if start == -1:
+        return None
+    if start == 0 and text.endswith("}"):
+        try:
+            parsed = fast_json.loads(text)
+        except ValueError:
+            pass
+        else:
+            return parsed if isinstance(parsed, dict) else None
+    try:
+        parsed, _ = _JSON_DECODER.raw_decode(text, start)
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _validate_reply(schema: Type[LLMReply], data: Dict) -> Optional[Dict]:
+    """Validate a parsed model reply, returning it in its original shape.
+
+    Only fields present in the reply are dumped back, so callers keep
+    receiving the same dict the model produced. Returns None if the reply
+    does not match the schema.
+    """
+    try:
+        return schema.model_validate(data).model_dump(exclude_unset=True)
+    except ValidationError as e:
+        logger.error(
+            "LLM reply does not match %s: %s",
+            schema.__name__,
+            e.errors(include_url=False, include_input=False),
+        )
+        return None
+
+
+def _validate_teammate_scores(data: Dict) -> Dict:
+    """Keep only candidate entries that are valid score/summary objects."""
+    scores: Dict = {}
+    for user_id, item in data.items():
+        if not isinstance(item, dict):
+            continue
+        validated = _validate_reply(TeammateScoreReply, item)
+        if validated is not None:
+            scores[user_id] = validated
+    return scores
+
+
+# Key rounds are already pre-selected by the demo analyzer; anything beyond
+# this adds prompt tokens without changing the report much.
+_MAX_DEMO_KEY_ROUNDS = 10
+
+
+def _strip_demo_defaults(value):
+    """Drop empty values from demo input and cap the number of key rounds.
+
+    None, empty strings and empty containers carry no information for the
+    model. Numeric zeros are kept because "0 kills" is not the same as an
+    unknown value.
+    """
+    if isinstance(value, dict):
+        stripped = {}
+        for key, item in value.items():
+            item = _strip_demo_defaults(item)
+            if key == "key_rounds" and isinstance(item, list):
+                item = item[:_MAX_DEMO_KEY_ROUNDS]
+            if item is None or (isinstance(item, (str, list, dict)) and not item):
+                continue
+            stripped[key] = item
+        return stripped
+    if isinstance(value, list):
+        return [_strip_demo_defaults(item) for item in value]
+    return value
+
+
+class _JsonObjectScanner:
+    """Incrementally find the first complete JSON object in streamed text.
+
+    Tracks brace depth outside of string literals (honouring escapes), so
+    a reply can be used as soon as its top-level object is closed instead
+    of waiting for the model to finish generating.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._start != -1:
+                    self._in_string = True
+            elif ch == "{":
+                if self._start == -1:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._start != -1:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = i + 1
+                    return text[self._start : i + 1]
+        self._pos = len(text)
+        return None
+
+
+async def _iter_stream_deltas(response: httpx.Response) -> AsyncIterator[str]:
+    """Yield message content chunks of a chat completion response.
+
+    Server-sent event streams are decoded delta by delta. Providers that
+    ignore ``stream`` and answer with a regular JSON body yield the whole
+    message as a single chunk.
+    """
+    if "text/event-stream" not in response.headers.get("content-type", ""):
+        await response.aread()
+        data = fast_json.loads(response.content)
+        yield data["choices"][0]["message"]["content"]
+        return
+
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        event = line[5:].strip()
+        if event == "[DONE]":
+            break
+        choices = fast_json.loads(event).get("choices") or []
+        delta = (choices[0].get("delta") or {}).get("content") if choices else None
+        if delta:
+            yield delta
+
+
+async def _read_streamed_content(response: httpx.Response) -> str:
+    """Read a chat completion response and return the message content.
+
+    For server-sent event streams, reading stops as soon as the first
+    complete JSON object has been received.
+    """
+    scanner = _JsonObjectScanner()
+    deltas = _iter_stream_deltas(response)
+    try:
+        async for delta in deltas:
+            obj = scanner.feed(delta)
+            if obj is not None:
+                return obj
+    finally:
+        await deltas.aclose()
+    return scanner.text
+
+
+# Static prompt scaffolding is built once at import time so that every request
+# sends byte-identical system prompts and only the dynamic fields are
+# interpolated per call.
+_SYSTEM_EN_ANALYSIS = sys.intern(
+    "You are a CS2 coach. Give specific, practical advice without fluff. "
+    "Answer ONLY in ENGLISH."
+)
+_SYSTEM_RU_ANALYSIS = sys.intern(
+    "Ты тренер по CS2. Давай конкретные практические советы без воды. "
+    "Отвечай ТОЛЬКО на РУССКОМ, кроме названий карт, оружия и CS-терминов."
+)
+
+_SYSTEM_EN_DEMO_COACH = sys.intern(
+    "You are a professional CS2 coach. Based on the structured match "
+    "data, generate a detailed coaching report for the player. "
+    "Return ONLY one valid JSON object with the following top-level "
+    "fields: overview, strengths, weaknesses, key_moments, "
+    "training_plan, summary. All text fields must be in ENGLISH."
+)
+_SYSTEM_RU_DEMO_COACH = sys.intern(
+    "Ты профессиональный тренер по CS2. На основе структурированных "
+    "данных матча составь подробный коуч-отчёт для игрока. Верни "
+    "ТОЛЬКО один корректный JSON-объект со следующими полями верхнего "
+    "уровня: overview, strengths, weaknesses, key_moments, "
+    "training_plan, summary. Все текстовые поля должны быть на "
+    "РУССКОМ языке."
+)
+_EN_DEMO_COACH_HEADER = sys.intern(
+    "You are an AI CS2 coach. You receive structured match data "
+    "(JSON below). Based on it, generate a detailed coaching report "
+    "for the player in JSON with the following schema: overview, "
+    "strengths, weaknesses, key_moments, training_plan, summary.\n\n"
+    "Input data:\n"
+)
+_RU_DEMO_COACH_HEADER = sys.intern(
+    "Ты — AI‑тренер по CS2. На входе у тебя структурированные данные "
+    "матча (JSON ниже). На их основе составь развёрнутый коуч‑отчёт "
+    "для игрока в формате JSON со следующей схемой: overview, "
+    "strengths, weaknesses, key_moments, training_plan, summary.\n\n"
+    "Входные данные:\n"
+)
+
+_SYSTEM_EN_TRAINING = sys.intern(
+    "You are a CS2 coach. Reply strictly in JSON format, without "
+    "any extra text. All text fields in the JSON must be in ENGLISH."
+)
+_SYSTEM_RU_TRAINING = sys.intern(
+    "Ты тренер по CS2. Отвечай строго в формате JSON, без "
+    "дополнительного текста. Все текстовые поля в JSON "
+    "должны быть на РУССКОМ языке."
+)
+
+_SYSTEM_EN_TEAMMATE = sys.intern(
+    "You are a CS2 coach. Given a player profile and a list of "
+    "candidate teammates, you evaluate how well each candidate "
+    "fits the player. Return ONLY one JSON object where keys are "
+    "candidate user_id values and values are objects with fields "
+    "'score' (0-1 float, higher is better) and 'summary' (short "
+    "text explanation in ENGLISH). Do not add any extra text."
+)
+_SYSTEM_RU_TEAMMATE = sys.intern(
+    "Ты тренер по CS2. Тебе дан профиль игрока и список кандидатов "
+    "в тиммейты. Оцени, насколько каждый кандидат подходит игроку. "
+    "Верни ТОЛЬКО один JSON-объект, где ключи — user_id кандидатов, "
+    "а значения — объекты с полями 'score' (число от 0 до 1, чем выше, "
+    "тем лучше) и 'summary' (короткое объяснение на русском языке). "
+    "Не добавляй никакого дополнительного текста."
+)
+
+_EN_ANALYSIS_TMPL = sys.intern(
+    """CS2 player stats: K/D {kd_ratio}, HS% {hs_percentage}, win rate {win_rate}, \
+avg damage {avg_damage}, matches {matches_played}, recent Faceit matches {history}.
+{extra}
+Answer in ENGLISH with 4 sections: 1. Strengths 2. Weaknesses \
+3. Recommendations 4. Plan for next week. Max 6 bullets, under 250 words.
+"""
+)
+_RU_ANALYSIS_TMPL = sys.intern(
+    """Статистика игрока CS2: K/D {kd_ratio}, HS% {hs_percentage}, винрейт {win_rate}, \
+средний урон {avg_damage}, матчей {matches_played}, недавних матчей Faceit {history}.
+{extra}
+Ответь на РУССКОМ в 4 разделах: 1. Сильные стороны 2. Слабые стороны \
+3. Рекомендации 4. План на неделю. Не больше 6 пунктов, до 250 слов.
+"""
+)
+
+_EN_TRAINING_TMPL = sys.intern(
+    """Create a detailed training plan specifically for a CS2 player.
+
+Player statistics:
+- K/D: {kd_ratio}
+- Headshot %: {hs_percentage}
+- Win Rate: {win_rate}
+
+Main focus areas for improvement: {focus}
+
+Strict requirements for the answer:
+- The plan MUST ONLY describe in-game CS2 activities
+  (aim training, spray control, movement, utility practice,
+  map/position study, demo review, teamplay, etc.).
+- Do NOT mention running, cardio, fitness, stretching, yoga,
+  skiing, swimming, nutrition, sleep, general health,
+  psychology, or any real-life wellness routines.
+- Return ONLY one valid JSON object with the following fields:
+  * daily_exercises: list of objects with fields
+    name, duration, description (all about CS2 practice).
+  * weekly_goals: list of strings with CS2-related goals.
+  * estimated_time: string with approximate time to see
+    improvement (for example, "4 weeks").
+- Do not add ANY explanations, comments or markdown outside JSON.
+
+All text fields (name, description, weekly_goals, estimated_time)
+must be in ENGLISH.
+"""
+)
+_RU_TRAINING_TMPL = sys.intern(
+    """Составь подробный тренировочный план по игре CS2 для одного игрока.
+
+Статистика игрока:
+- K/D: {kd_ratio}
+- Headshot %: {hs_percentage}
+- Win Rate: {win_rate}
+
+Основные направления для улучшения: {focus}
+
+Жёсткие требования к ответу:
+- План должен касаться ТОЛЬКО игровых активностей в CS2
+  (тренировка аима, спрея, мувмента, раскидок, позиционирования,
+  командного взаимодействия, разбора демок и т.п.).
+- НЕ упоминай бег, кардио, фитнес, зарядку, растяжку, йогу,
+  плавание, питание, сон, здоровье, психологию, отдых вне игры
+  и любые другие темы, не связанные напрямую с CS2.
+- Верни ТОЛЬКО один корректный JSON-объект со следующими полями:
+  * daily_exercises: список объектов с полями name, duration, description
+    (все упражнения связаны с практикой в CS2).
+  * weekly_goals: список строк с целями по CS2.
+  * estimated_time: строка с примерным сроком достижения целей
+    (например, "4 недели").
+- Никакого текста вне JSON (никаких комментариев или markdown).
+
+Все текстовые поля (name, description, weekly_goals, estimated_time)
+должны быть НА РУССКОМ ЯЗЫКЕ.
+"""
+)
+
+# Output budget for analyze_player_performance. The prompt asks for at most
+# ~250 words; "short" is for compact surfaces such as bot notifications.
+_ANALYSIS_MAX_TOKENS = {"short": 200, "normal": 350}
+# Stop once the model starts going past the requested 4 sections
+_ANALYSIS_STOP = ("\n\n5.", "```")
+# Key rounds included in an analysis prompt before budget trimming
+_MAX_PROMPT_KEY_MOMENTS = 3
+
+
+class _PromptFields(dict):
+    """format_map() mapping over player stats; missing metrics read as N/A."""
+
+    def __missing__(self, key: str) -> str:
+        return "N/A"
+
+
+# Per-language prompt text. Builders pick one table per call instead of
+# branching on the language for every fragment.
+_L10N: Dict[str, Dict[str, str]] = {
+    "en": {
+        "system_analysis": _SYSTEM_EN_ANALYSIS,
+        "analysis_tmpl": _EN_ANALYSIS_TMPL,
+        "system_demo_coach": _SYSTEM_EN_DEMO_COACH,
+        "demo_coach_header": _EN_DEMO_COACH_HEADER,
+        "system_training": _SYSTEM_EN_TRAINING,
+        "training_tmpl": _EN_TRAINING_TMPL,
+        "system_teammate": _SYSTEM_EN_TEAMMATE,
+        "map": "Map: {}",
+        "score": "Final score: {}:{} over {} rounds",
+        "round_kv": "round {}: {}",
+        "key_rounds": "Key rounds in this match: {}",
+    },
+    "ru": {
+        "system_analysis": _SYSTEM_RU_ANALYSIS,
+        "analysis_tmpl": _RU_ANALYSIS_TMPL,
+        "system_demo_coach": _SYSTEM_RU_DEMO_COACH,
+        "demo_coach_header": _RU_DEMO_COACH_HEADER,
+        "system_training": _SYSTEM_RU_TRAINING,
+        "training_tmpl": _RU_TRAINING_TMPL,
+        "system_teammate": _SYSTEM_RU_TEAMMATE,
+        "map": "Карта: {}",
+        "score": "Финальный счёт: {}:{} за {} раундов",
+        "round_kv": "раунд {}: {}",
+        "key_rounds": "Ключевые раунды в этом матче: {}",
+    },
+}
+
+# Fallback plans used when the LLM is unavailable. They are serialized once
+# at import; each call decodes a fresh copy so callers may mutate it.
+_DEFAULT_TRAINING_PLANS: Dict[str, Dict[str, Any]] = {
+    "en": {
+        "focus_areas": ["aim", "game sense", "consistency"],
+        "daily_exercises": [
+            {
+                "name": "Aim Training",
+                "duration": 30,
+                "description": "Aim training on aim_botz",
+            },
+            {
+                "name": "Spray Control",
+                "duration": 20,
+                "description": "Recoil control for AK-47 and M4A4",
+            },
+        ],
+        "weekly_goals": [
+            "Increase accuracy by 5%",
+            "Improve K/D to 1.2",
+        ],
+        "estimated_time": "2-3 weeks",
+    },
+    "ru": {
+        "focus_areas": ["aim", "game sense", "consistency"],
+        "daily_exercises": [
+            {
+                "name": "Тренировка аима",
+                "duration": 30,
+                "description": "Тренировка аима на aim_botz и картах для практики",
+            },
+            {
+                "name": "Контроль спрея",
+                "duration": 20,
+                "description": "Отработка отдачи на AK-47 и M4A4",
+            },
+        ],
+        "weekly_goals": [
+            "Увеличить точность стрельбы на 5%",
+            "Довести K/D до 1.2",
+        ],
+        "estimated_time": "2-3 недели",
+    },
+}
+_DEFAULT_TRAINING_PLAN_JSON: Dict[str, bytes] = {
+    lang: fast_json.dumps_bytes(plan)
+    for lang, plan in _DEFAULT_TRAINING_PLANS.items()
+}
+
 
 class GroqService:
     """Service for Groq API"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    __slots__ = (
+        "provider",
+        "groq_base_url",
+        "model",
+        "api_key",
+        "_is_openrouter",
+        "_static_headers",
+        "_json_mode",
+        "_provider_options",
+        "retry_attempts",
+        "request_timeout",
+        "cache_ttl",
+        "retry_base_delay",
+        "max_prompt_tokens",
+        "task_models",
+        "_body_parts_cache",
+        "_rate_limiters",
+        "_breaker",
+    )
+
+    def __init__(self, api_key: Optional[str] = None, max_prompt_tokens: int = 512):
         local_base_url = getattr(settings, "LOCAL_LLM_BASE_URL", None)
         local_model = getattr(settings, "LOCAL_LLM_MODEL", None)
         openrouter_api_key = getattr(settings, "OPENROUTER_API_KEY", None)
@@ -39,11 +643,62 @@ class GroqService:
             self.provider = "groq"
             self.api_key = api_key or getattr(settings, "GROQ_API_KEY", None)
             self.groq_base_url = "https://api.groq.com/openai/v1/chat/completions"
-            self.model = getattr(settings, "GROQ_MODEL", "llama3-70b-8192")
+            self.model = getattr(settings, "GROQ_MODEL", None) or "llama3-70b-8192"
 
         if not self.api_key and self.provider != "local":
             logger.warning("Groq API key not configured")
 
+        # Provider, key and app settings are fixed for the lifetime of the
+        # service, so request headers are built once and shared by all calls.
+        self._is_openrouter = self._is_openrouter_base_url()
+        self._static_headers = self._build_static_headers()
+        # Hosted providers accept OpenAI-style JSON mode; local servers vary
+        self._json_mode = self.provider in ("groq", "openrouter")
+        # Let OpenRouter route to the lowest-latency backend for the model
+        self._provider_options: Dict[str, Any] = (
+            {"provider": {"sort": "latency"}} if self._is_openrouter else {}
+        )
+
+        self.retry_attempts = max(
+            1, int(getattr(settings, "GROQ_RETRY_ATTEMPTS", 4) or 1)
+        )
+        self.request_timeout = float(
+            getattr(settings, "GROQ_REQUEST_TIMEOUT", 30.0) or 30.0
+        )
+        self.cache_ttl = float(getattr(settings, "GROQ_CACHE_TTL", 3600) or 0)
+        self.retry_base_delay = float(
+            getattr(settings, "GROQ_RETRY_BASE_DELAY", 0.4) or 0.0
+        )
+        # Budget for the user part of analysis prompts; optional context is
+        # dropped until the prompt fits
+        self.max_prompt_tokens = max_prompt_tokens
+        # Per-task model overrides. Training plans are short JSON built from
+        # a few numbers, so on Groq they go to the faster small model.
+        self.task_models: Dict[str, str] = {}
+        fast_model = getattr(settings, "GROQ_FAST_MODEL", None)
+        if self.provider == "groq" and fast_model:
+            self.task_models["training_plan"] = fast_model
+        self._body_parts_cache: Dict[Tuple[Any, ...], Tuple[bytes, bytes]] = {}
+        # Provider RPM/TPM limits apply per model
+        rpm = int(getattr(settings, "GROQ_RPM", 0) or 0)
+        tpm = int(getattr(settings, "GROQ_TPM", 0) or 0)
+        self._rate_limiters: Dict[str, Optional[ModelRateLimiter]] = {
+            model: get_model_rate_limiter(model, rpm=rpm, tpm=tpm)
+            for model in {str(self.model), *self.task_models.values()}
+        }
+        # One circuit per provider endpoint, shared by all instances
+        self._breaker = get_circuit_breaker(
+            str(self.groq_base_url),
+            fail_max=int(getattr(settings, "GROQ_BREAKER_FAIL_MAX", 0) or 0),
+            reset_timeout=float(
+                getattr(settings, "GROQ_BREAKER_RESET_TIMEOUT", 0) or 0
+            ),
+        )
+
+    def _model_for(self, task: str) -> str:
+        """Model used for ``task``; falls back to the configured model."""
+        return self.task_models.get(task) or str(self.model)
+
     def _is_openrouter_base_url(self) -> bool:
         """Return True if groq_base_url points to openrouter.ai host."""
         try:
@@ -52,6 +707,42 @@ class GroqService:
         except Exception:
             return False
 
+    def _build_static_headers(self) -> Dict[str, str]:
+        headers = {
+            "Content-Type": "application/json",
+        }
+
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        if self._is_openrouter:
+            referer = getattr(settings, "WEBSITE_URL", "")
+            app_title = getattr(settings, "APP_TITLE", "Faceit AI Bot")
+            if referer:
+                headers["HTTP-Referer"] = referer
+            headers["X-Title"] = app_title
+
+        return headers
+
+    async def warmup(self) -> None:
+        """Open a pooled connection to the provider ahead of the first request.
+
+        Issues a cheap ``GET /models`` so DNS and the TLS handshake are paid
+        at startup. Failures are ignored; the real request simply connects.
+        """
+        if not self.api_key and self.provider != "local":
+            return
+
+        models_url = str(self.groq_base_url).rsplit("/chat/completions", 1)[0]
+        try:
+            await _get_http_client().get(
+                models_url + "/models",
+                headers=self._static_headers,
+                timeout=5.0,
+            )
+        except Exception:
+            logger.debug("LLM connection warmup failed", exc_info=True)
+
     def _normalize_language(self, language: Optional[str]) -> str:
         """Normalize language code to a small set (currently 'ru' or 'en')."""
         if not language:
@@ -63,6 +754,182 @@ class GroqService:
             return "ru"
         return "en"
 
+    def _body_parts(
+        self,
+        system_content: str,
+        temperature: float,
+        max_tokens: int,
+        stream: bool = False,
+        json_mode: bool = False,
+        stop: Tuple[str, ...] = (),
+        model: Optional[str] = None,
+    ) -> Tuple[bytes, bytes]:
+        """Serialized request body around the user message, cached per family.
+
+        Model, system prompt and sampling parameters are fixed for a given
+        (task, language) pair, so only the user content is encoded per call
+        and every request of a family shares a byte-identical prefix.
+        """
+        key = (system_content, temperature, max_tokens, stream, json_mode, stop, model)
+        parts = self._body_parts_cache.get(key)
+        if parts is None:
+            body: Dict[str, Any] = {
+                "model": model or self.model,
+                "messages": [
+                    {"role": "system", "content": system_content},
+                    {"role": "user", "content": _USER_CONTENT_MARKER},
+                ],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            }
+            if stop:
+                body["stop"] = list(stop)
+            if stream:
+                body["stream"] = True
+            # Groq rejects JSON mode on streamed requests
+            if (
+                json_mode
+                and self._json_mode
+                and not (stream and self.provider == "groq")
+            ):
+                body["response_format"] = {"type": "json_object"}
+            body.update(self._provider_options)
+            template = json.dumps(
+                body,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode("utf-8")
+            prefix, _, suffix = template.partition(
+                json.dumps(_USER_CONTENT_MARKER).encode("utf-8")
+            )
+            parts = self._body_parts_cache[key] = (prefix, suffix)
+        return parts
+
+    async def _chat_completion(
+        self,
+        system_content: str,
+        user_content: str,
+        temperature: float,
+        max_tokens: int,
+        stream: bool = False,
+        json_mode: bool = False,
+        stop: Tuple[str, ...] = (),
+        model: Optional[str] = None,
+    ) -> httpx.Response:
+        """Send a system + user chat request to the configured provider.
+
+        With ``stream=True`` the response body is not read; the caller must
+        consume it and close the response. ``json_mode`` asks providers that
+        support it to return a single JSON object. ``model`` overrides the
+        configured model for this request.
+        """
+        prefix, suffix = self._body_parts(
+            system_content, temperature, max_tokens, stream, json_mode, stop, model
+        )
+        encoded_user = fast_json.dumps_bytes(user_content)
+        body = prefix + encoded_user + suffix
+        # Rough token cost for the client-side limiter
+        estimated_tokens = (
+            max_tokens + _estimate_tokens(system_content) + _estimate_tokens(user_content)
+        )
+        return await self._post_with_retry(
+            self.groq_base_url,
+            self._static_headers,
+            body,
+            estimated_tokens,
+            stream=stream,
+            model=model,
+        )
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Delay before the next attempt: Retry-After if given, else backoff."""
+        delay = _parse_retry_after(retry_after)
+        if delay is not None:
+            return delay
+        backoff = min(self.retry_base_delay * (2 ** (attempt - 1)), _RETRY_MAX_DELAY)
+        return backoff + random.uniform(0, self.retry_base_delay)
+
+    async def _post_with_retry(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        body: bytes,
+        estimated_tokens: int = 0,
+        stream: bool = False,
+        model: Optional[str] = None,
+    ) -> httpx.Response:
+        """POST to the provider, retrying timeouts, 429 and 5xx responses.
+
+        Uses exponential backoff with jitter and honours ``Retry-After``.
+        The last response (or transport error) is returned/raised unchanged
+        so callers keep their existing error handling. Each attempt first
+        waits for the client-side RPM/TPM budget when a limiter is configured.
+        With ``stream=True`` only the response headers are awaited.
+
+        Requests that still fail after all retries count against the
+        provider's circuit breaker; while it is open, CircuitOpenError is
+        raised immediately and callers fall back as for any other error.
+        """
+        breaker = self._breaker
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(f"LLM provider circuit open: {self.provider}")
+
+        rate_limiter = self._rate_limiters.get(model or str(self.model))
+        for attempt in range(1, self.retry_attempts + 1):
+            if rate_limiter is not None:
+                await rate_limiter.acquire(estimated_tokens)
+            try:
+                # httpx timeouts bound each network operation; wait_for also
+                # bounds the whole attempt so a slowly trickling response
+                # cannot hold the request indefinitely.
+                client = _get_http_client()
+                request = client.build_request(
+                    "POST",
+                    url,
+                    headers=headers,
+                    content=body,
+                )
+                response = await asyncio.wait_for(
+                    client.send(request, stream=stream),
+                    self.request_timeout,
+                )
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                if attempt >= self.retry_attempts:
+                    if breaker is not None:
+                        breaker.record_failure()
+                    raise
+                delay = self._retry_delay(attempt, None)
+                logger.warning(
+                    "LLM request failed (%s), retry %s/%s in %.2fs",
+                    e.__class__.__name__,
+                    attempt,
+                    self.retry_attempts - 1,
+                    delay,
+                )
+            else:
+                if response.status_code not in _RETRYABLE_STATUSES:
+                    if breaker is not None:
+                        breaker.record_success()
+                    return response
+                if attempt >= self.retry_attempts:
+                    if breaker is not None:
+                        breaker.record_failure()
+                    return response
+                if stream:
+                    await response.aclose()
+                delay = self._retry_delay(
+                    attempt, response.headers.get("Retry-After")
+                )
+                logger.warning(
+                    "LLM provider returned %s, retry %s/%s in %.2fs",
+                    response.status_code,
+                    attempt,
+                    self.retry_attempts - 1,
+                    delay,
+                )
+            await asyncio.sleep(delay)
+
+        raise RuntimeError("unreachable")  # pragma: no cover
 
     def _log_sample(
         self,
@@ -78,13 +945,13 @@ class GroqService:
                 "input": input_payload,
                 "output": output_payload,
             }
-            logger.info(
-                "ai_sample %s",
-                json.dumps(record, ensure_ascii=False, default=str),
-            )
-
-            # Additionally, persist samples for future coach model training
-            append_sample(record)
+            # Serialize once and share the line between the log and the
+            # JSONL store used for future coach model training. The write
+            # happens in a background thread so that slow disks never stall
+            # concurrent LLM requests on the event loop.
+            line = fast_json.dumps(record)
+            logger.info("ai_sample %s", line)
+            enqueue_sample_line(line)
         except Exception:
             logger.exception("Failed to log AI sample")
 
@@ -93,6 +960,7 @@ class GroqService:
         stats: Dict,
         match_history: Optional[List[Dict]] = None,
         language: str = "ru",
+        detail_level: Literal["short", "normal"] = "normal",
     ) -> str:
         """
         Analyze player performance with Groq AI
@@ -100,6 +968,7 @@ class GroqService:
         Args:
             stats: Current player statistics
             match_history: Recent match history
+            detail_level: "short" caps the answer at a smaller token budget
 
         Returns:
             Detailed analysis and recommendations
@@ -109,88 +978,167 @@ class GroqService:
 
         try:
             lang = self._normalize_language(language)
-            prompt = self._build_analysis_prompt(stats, match_history or [], lang)
+            max_tokens = _ANALYSIS_MAX_TOKENS.get(
+                detail_level, _ANALYSIS_MAX_TOKENS["normal"]
+            )
+            cache_key = self._analysis_cache_key(
+                stats, match_history, lang, max_tokens
+            )
+            if self.cache_ttl > 0:
+                cached = _response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+            return await _single_flight(
+                cache_key,
+                lambda: self._request_analysis(
+                    stats, match_history or [], lang, max_tokens, cache_key
+                ),
+            )
 
-            headers = {
-                "Content-Type": "application/json",
-            }
+        except Exception as e:
+            logger.error("Groq API error: %s", e)
+            return (
+                f"Error analyzing performance: {str(e)}"
+            )
 
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            if self._is_openrouter_base_url():
-                referer = getattr(settings, "WEBSITE_URL", "")
-                app_title = getattr(settings, "APP_TITLE", "Faceit AI Bot")
-                if referer:
-                    headers["HTTP-Referer"] = referer
-                headers["X-Title"] = app_title
-
-            if lang == "en":
-                system_content = (
-                    "You are a professional CS2 coach with over 10 years of experience. "
-                    "Analyze the provided statistics and context (including demo data if present) "
-                    "and give specific, practical recommendations for improvement. "
-                    "Always answer ONLY in ENGLISH. Do NOT use Russian or other languages. "
-                    "Be reasonably detailed but avoid unnecessary fluff."
-                )
-            else:
-                system_content = (
-                    "Ты профессиональный тренер по CS2 с более чем 10-летним опытом. "
-                    "Анализируй переданные показатели и контекст (включая данные демки, если есть) "
-                    "и давай конкретные, практические рекомендации по улучшению. "
-                    "Всегда отвечай ТОЛЬКО на РУССКОМ языке. Не используй английский, кроме "
-                    "названий карт, оружия и стандартных CS-терминов. Будь подробным, но без воды."
-                )
+    async def _request_analysis(
+        self,
+        stats: Dict,
+        match_history: List[Dict],
+        lang: str,
+        max_tokens: int,
+        cache_key: str,
+    ) -> str:
+        prompt = self._build_analysis_prompt(stats, match_history, lang)
+
+        response = await self._chat_completion(
+            _L10N[lang]["system_analysis"],
+            prompt,
+            temperature=0.5,
+            max_tokens=max_tokens,
+            stop=_ANALYSIS_STOP,
+        )
+        if response.status_code == 200:
+            data = fast_json.loads(response.content)
+            raw_content = data["choices"][0]["message"]["content"]
+            content = str(raw_content)
+            self._store_analysis(stats, match_history, lang, cache_key, content)
+            return content
+        else:
+            error_text = response.text
+            logger.error(
+                "Groq API error: %s - %s", response.status_code, error_text
+            )
+            return (
+                f"Error analyzing performance: "
+                f"{response.status_code}"
+            )
 
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": system_content,
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.5,
-                "max_tokens": 300
-            }
+    async def stream_player_performance(
+        self,
+        stats: Dict,
+        match_history: Optional[List[Dict]] = None,
+        language: str = "ru",
+        detail_level: Literal["short", "normal"] = "normal",
+    ) -> AsyncIterator[str]:
+        """Streaming variant of analyze_player_performance.
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.groq_base_url,
-                    headers=headers,
-                    json=payload
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        raw_content = data["choices"][0]["message"]["content"]
-                        content = str(raw_content)
-                        self._log_sample(
-                            task="analysis",
-                            language=lang,
-                            input_payload={
-                                "stats": stats,
-                                "match_history": match_history or [],
-                            },
-                            output_payload=content,
-                        )
-                        return content
-                    else:
-                        error_text = await response.text()
-                        logger.error(
-                            f"Groq API error: {response.status} - "
-                            f"{error_text}"
-                        )
-                        return (
-                            f"Error analyzing performance: "
-                            f"{response.status}"
-                        )
+        Yields the analysis text chunk by chunk as the model generates it,
+        so callers can start rendering after the first token. A cached
+        analysis is yielded as a single chunk.
+        """
+        if not self.api_key and self.provider != "local":
+            yield "Analysis unavailable - API key not configured"
+            return
 
-        except Exception as e:
-            logger.error(f"Groq API error: {str(e)}")
-            return (
-                f"Error analyzing performance: {str(e)}"
+        lang = self._normalize_language(language)
+        history = match_history or []
+        max_tokens = _ANALYSIS_MAX_TOKENS.get(
+            detail_level, _ANALYSIS_MAX_TOKENS["normal"]
+        )
+        cache_key = self._analysis_cache_key(stats, history, lang, max_tokens)
+        if self.cache_ttl > 0:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        try:
+            response = await self._chat_completion(
+                _L10N[lang]["system_analysis"],
+                self._build_analysis_prompt(stats, history, lang),
+                temperature=0.5,
+                max_tokens=max_tokens,
+                stream=True,
+                stop=_ANALYSIS_STOP,
             )
+        except Exception as e:
+            logger.error("Groq API error: %s", e)
+            yield f"Error analyzing performance: {str(e)}"
+            return
+
+        parts: List[str] = []
+        try:
+            if response.status_code != 200:
+                await response.aread()
+                logger.error(
+                    "Groq API error: %s - %s", response.status_code, response.text
+                )
+                yield f"Error analyzing performance: {response.status_code}"
+                return
+            try:
+                async for delta in _iter_stream_deltas(response):
+                    parts.append(delta)
+                    yield delta
+            except (httpx.HTTPError, asyncio.TimeoutError) as e:
+                # The partial text is not a complete analysis: don't cache it
+                logger.error("Groq API stream interrupted: %s", e)
+                yield f"Error analyzing performance: {str(e) or type(e).__name__}"
+                return
+        finally:
+            await response.aclose()
+
+        content = "".join(parts)
+        if content:
+            self._store_analysis(stats, history, lang, cache_key, content)
+
+    def _analysis_cache_key(
+        self,
+        stats: Dict,
+        match_history: Optional[List[Dict]],
+        lang: str,
+        max_tokens: int,
+    ) -> str:
+        return _cache_key(
+            "analysis",
+            self._model_for("analysis"),
+            lang,
+            max_tokens,
+            stats,
+            len(match_history or []),
+        )
+
+    def _store_analysis(
+        self,
+        stats: Dict,
+        match_history: List[Dict],
+        lang: str,
+        cache_key: str,
+        content: str,
+    ) -> None:
+        """Log a completed analysis as a training sample and cache it."""
+        self._log_sample(
+            task="analysis",
+            language=lang,
+            input_payload={
+                "stats": stats,
+                "match_history": match_history,
+            },
+            output_payload=content,
+        )
+        if self.cache_ttl > 0:
+            _response_cache.set(cache_key, content, ttl=self.cache_ttl)
 
     async def generate_demo_coach_report(
         self,
@@ -201,127 +1149,44 @@ class GroqService:
         if not self.api_key and getattr(self, "provider", None) != "local":
             return {}
 
-        if lang == "en":
-            system_content = (
-                "You are a professional CS2 coach. Based on the structured match "
-                "data, generate a detailed coaching report for the player. "
-                "Return ONLY one valid JSON object with the following top-level "
-                "fields: overview, strengths, weaknesses, key_moments, "
-                "training_plan, summary. All text fields must be in ENGLISH."
-            )
-            header = (
-                "You are an AI CS2 coach. You receive structured match data "
-                "(JSON below). Based on it, generate a detailed coaching report "
-                "for the player in JSON with the following schema: overview, "
-                "strengths, weaknesses, key_moments, training_plan, summary.\n\n"
-                "Input data:\n"
-            )
-        else:
-            system_content = (
-                "Ты профессиональный тренер по CS2. На основе структурированных "
-                "данных матча составь подробный коуч-отчёт для игрока. Верни "
-                "ТОЛЬКО один корректный JSON-объект со следующими полями верхнего "
-                "уровня: overview, strengths, weaknesses, key_moments, "
-                "training_plan, summary. Все текстовые поля должны быть на "
-                "РУССКОМ языке."
-            )
-            header = (
-                "Ты — AI‑тренер по CS2. На входе у тебя структурированные данные "
-                "матча (JSON ниже). На их основе составь развёрнутый коуч‑отчёт "
-                "для игрока в формате JSON со следующей схемой: overview, "
-                "strengths, weaknesses, key_moments, training_plan, summary.\n\n"
-                "Входные данные:\n"
-            )
-
-        user_prompt = header + json.dumps(demo_input, ensure_ascii=False, indent=2)
-
-        headers = {
-            "Content-Type": "application/json",
-        }
-
-        if self.api_key:
-            headers["Authorization"] = f"Bearer {self.api_key}"
-
-        if self._is_openrouter_base_url():
-            referer = getattr(settings, "WEBSITE_URL", "")
-            app_title = getattr(settings, "APP_TITLE", "Faceit AI Bot")
-            if referer:
-                headers["HTTP-Referer"] = referer
-            headers["X-Title"] = app_title
-
-        payload = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": system_content,
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt,
-                },
-            ],
-            "temperature": 0.4,
-            "max_tokens": 800,
-        }
+        texts = _L10N[lang]
+        user_prompt = texts["demo_coach_header"] + fast_json.dumps(
+            _strip_demo_defaults(demo_input)
+        )
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.groq_base_url,
-                    headers=headers,
-                    json=payload,
-                ) as response:
-                    if response.status != 200:
-                        text = await response.text()
-                        logger.error(
-                            "Groq demo coach error: %s - %s",
-                            response.status,
-                            text,
-                        )
-                        return {}
-                    data = await response.json()
-                    content = data["choices"][0]["message"][
-                        "content"
-                    ]
-
-            text = content.strip()
-            if text.startswith("```"):
-                lines = text.splitlines()
-                cleaned_lines = [
-                    line
-                    for line in lines
-                    if not line.strip().startswith("```")
-                ]
-                text = "\n".join(cleaned_lines).strip()
-
-            try:
-                report = json.loads(text)
-            except json.JSONDecodeError:
-                start = text.find("{")
-                end = text.rfind("}")
-                if start != -1 and end != -1 and end > start:
-                    try:
-                        report = json.loads(text[start : end + 1])
-                    except json.JSONDecodeError:
-                        logger.error(
-                            "Failed to parse demo coach report JSON",
-                            exc_info=True,
-                        )
-                        return {}
-                else:
-                    return {}
-
-            if isinstance(report, dict):
-                self._log_sample(
-                    task="demo_coach_report",
-                    language=lang,
-                    input_payload={"demo_input": demo_input},
-                    output_payload=report,
+            response = await self._chat_completion(
+                texts["system_demo_coach"],
+                user_prompt,
+                temperature=0.4,
+                max_tokens=800,
+                json_mode=True,
+            )
+            if response.status_code != 200:
+                logger.error(
+                    "Groq demo coach error: %s - %s",
+                    response.status_code,
+                    response.text,
                 )
-                return report
+                return {}
+            data = fast_json.loads(response.content)
+            content = data["choices"][0]["message"]["content"]
 
-            return {}
+            report = _extract_json_object(content)
+            if report is None:
+                logger.error("Failed to parse demo coach report JSON")
+                return {}
+            report = _validate_reply(DemoCoachReportReply, report)
+            if report is None:
+                return {}
+
+            self._log_sample(
+                task="demo_coach_report",
+                language=lang,
+                input_payload={"demo_input": demo_input},
+                output_payload=report,
+            )
+            return report
         except Exception:
             logger.exception("Error in generate_demo_coach_report")
             return {}
@@ -348,171 +1213,89 @@ class GroqService:
             return self._get_default_training_plan(lang)
 
         try:
-            if lang == "en":
-                prompt = f"""
-                Create a detailed training plan specifically for a CS2 player.
-
-                Player statistics:
-                - K/D: {player_stats.get('kd_ratio', 'N/A')}
-                - Headshot %: {player_stats.get('hs_percentage', 'N/A')}
-                - Win Rate: {player_stats.get('win_rate', 'N/A')}
-
-                Main focus areas for improvement: {', '.join(focus_areas)}
-
-                Strict requirements for the answer:
-                - The plan MUST ONLY describe in-game CS2 activities
-                  (aim training, spray control, movement, utility practice,
-                  map/position study, demo review, teamplay, etc.).
-                - Do NOT mention running, cardio, fitness, stretching, yoga,
-                  skiing, swimming, nutrition, sleep, general health,
-                  psychology, or any real-life wellness routines.
-                - Return ONLY one valid JSON object with the following fields:
-                  * daily_exercises: list of objects with fields
-                    name, duration, description (all about CS2 practice).
-                  * weekly_goals: list of strings with CS2-related goals.
-                  * estimated_time: string with approximate time to see
-                    improvement (for example, "4 weeks").
-                - Do not add ANY explanations, comments or markdown outside JSON.
-
-                All text fields (name, description, weekly_goals, estimated_time)
-                must be in ENGLISH.
-                """
-            else:
-                prompt = f"""
-                Составь подробный тренировочный план по игре CS2 для одного игрока.
-
-                Статистика игрока:
-                - K/D: {player_stats.get('kd_ratio', 'N/A')}
-                - Headshot %: {player_stats.get('hs_percentage', 'N/A')}
-                - Win Rate: {player_stats.get('win_rate', 'N/A')}
-
-                Основные направления для улучшения: {', '.join(focus_areas)}
-
-                Жёсткие требования к ответу:
-                - План должен касаться ТОЛЬКО игровых активностей в CS2
-                  (тренировка аима, спрея, мувмента, раскидок, позиционирования,
-                  командного взаимодействия, разбора демок и т.п.).
-                - НЕ упоминай бег, кардио, фитнес, зарядку, растяжку, йогу,
-                  плавание, питание, сон, здоровье, психологию, отдых вне игры
-                  и любые другие темы, не связанные напрямую с CS2.
-                - Верни ТОЛЬКО один корректный JSON-объект со следующими полями:
-                  * daily_exercises: список объектов с полями name, duration, description
-                    (все упражнения связаны с практикой в CS2).
-                  * weekly_goals: список строк с целями по CS2.
-                  * estimated_time: строка с примерным сроком достижения целей
-                    (например, "4 недели").
-                - Никакого текста вне JSON (никаких комментариев или markdown).
-
-                Все текстовые поля (name, description, weekly_goals, estimated_time)
-                должны быть НА РУССКОМ ЯЗЫКЕ.
-                """
-
-            headers = {
-                "Content-Type": "application/json"
-            }
-
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            if lang == "en":
-                system_content = (
-                    "You are a CS2 coach. Reply strictly in JSON format, without "
-                    "any extra text. All text fields in the JSON must be in ENGLISH."
-                )
-            else:
-                system_content = (
-                    "Ты тренер по CS2. Отвечай строго в формате JSON, без "
-                    "дополнительного текста. Все текстовые поля в JSON "
-                    "должны быть на РУССКОМ языке."
-                )
-
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": system_content,
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.4,
-                "max_tokens": 300
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.groq_base_url,
-                    headers=headers,
-                    json=payload
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        content = data["choices"][0]["message"][
-                            "content"
-                        ]
-
-                        # Try to parse JSON strictly first
-                        text = content.strip()
-
-                        # Remove optional markdown code fences
-                        if text.startswith("```"):
-                            lines = text.splitlines()
-                            cleaned_lines = [
-                                line
-                                for line in lines
-                                if not line.strip().startswith("```")
-                            ]
-                            text = "\n".join(cleaned_lines).strip()
-
-                        plan: Dict | None = None
-
-                        try:
-                            plan = json.loads(text)
-                        except json.JSONDecodeError:
-                            start = text.find("{")
-                            end = text.rfind("}")
-                            if start != -1 and end != -1 and end > start:
-                                candidate_span = text[start : end + 1]
-                                try:
-                                    plan = json.loads(candidate_span)
-                                except json.JSONDecodeError:
-                                    brace_level = 0
-                                    for idx, ch in enumerate(text[start:], start):
-                                        if ch == "{":
-                                            brace_level += 1
-                                        elif ch == "}":
-                                            brace_level -= 1
-                                            if brace_level == 0:
-                                                candidate = text[start : idx + 1]
-                                                try:
-                                                    plan = json.loads(candidate)
-                                                    break
-                                                except json.JSONDecodeError:
-                                                    continue
-
-                        if plan is None:
-                            logger.error(
-                                "Failed to parse Groq training plan JSON",
-                            )
-                            return self._get_default_training_plan(lang)
-
-                        self._log_sample(
-                            task="training_plan",
-                            language=lang,
-                            input_payload={
-                                "player_stats": player_stats,
-                                "focus_areas": focus_areas,
-                            },
-                            output_payload=plan,
-                        )
-                        return plan
-                    else:
-                        return self._get_default_training_plan(lang)
+            cache_key = _cache_key(
+                "training_plan",
+                self._model_for("training_plan"),
+                lang,
+                player_stats,
+                focus_areas,
+            )
+            if self.cache_ttl > 0:
+                cached = _response_cache.get(cache_key)
+                if cached is not None:
+                    return copy.deepcopy(cached)
+
+            plan = await _single_flight(
+                cache_key,
+                lambda: self._request_training_plan(
+                    player_stats, focus_areas, lang, cache_key
+                ),
+            )
+            # Concurrent callers share one result object; hand out copies
+            return copy.deepcopy(plan)
 
         except Exception as e:
-            logger.error(f"Error generating training plan: {str(e)}")
+            logger.error("Error generating training plan: %s", e)
             return self._get_default_training_plan(lang)
 
+    async def _request_training_plan(
+        self,
+        player_stats: Dict,
+        focus_areas: List[str],
+        lang: str,
+        cache_key: str,
+    ) -> Dict:
+        texts = _L10N[lang]
+        fields = _PromptFields(player_stats)
+        fields["focus"] = ", ".join(focus_areas)
+        prompt = texts["training_tmpl"].format_map(fields)
+
+        # Streamed so the plan is usable as soon as its JSON object closes
+        response = await self._chat_completion(
+            texts["system_training"],
+            prompt,
+            temperature=0.4,
+            max_tokens=300,
+            stream=True,
+            json_mode=True,
+            model=self._model_for("training_plan"),
+        )
+        try:
+            if response.status_code != 200:
+                return self._get_default_training_plan(lang)
+            content = await asyncio.wait_for(
+                _read_streamed_content(response),
+                self.request_timeout,
+            )
+        finally:
+            # Closing early releases the upstream generation slot
+            await response.aclose()
+
+        plan = _extract_json_object(content)
+        if plan is None:
+            logger.error(
+                "Failed to parse Groq training plan JSON",
+            )
+            return self._get_default_training_plan(lang)
+        plan = _validate_reply(TrainingPlanReply, plan)
+        if plan is None:
+            return self._get_default_training_plan(lang)
+
+        self._log_sample(
+            task="training_plan",
+            language=lang,
+            input_payload={
+                "player_stats": player_stats,
+                "focus_areas": focus_areas,
+            },
+            output_payload=plan,
+        )
+        if self.cache_ttl > 0:
+            _response_cache.set(
+                cache_key, copy.deepcopy(plan), ttl=self.cache_ttl
+            )
+        return plan
+
     async def describe_teammate_matches(
         self,
         payload: Dict,
@@ -524,114 +1307,38 @@ class GroqService:
             return {}
 
         try:
-            if lang == "en":
-                system_content = (
-                    "You are a CS2 coach. Given a player profile and a list of "
-                    "candidate teammates, you evaluate how well each candidate "
-                    "fits the player. Return ONLY one JSON object where keys are "
-                    "candidate user_id values and values are objects with fields "
-                    "'score' (0-1 float, higher is better) and 'summary' (short "
-                    "text explanation in ENGLISH). Do not add any extra text."
-                )
-            else:
-                system_content = (
-                    "Ты тренер по CS2. Тебе дан профиль игрока и список кандидатов "
-                    "в тиммейты. Оцени, насколько каждый кандидат подходит игроку. "
-                    "Верни ТОЛЬКО один JSON-объект, где ключи — user_id кандидатов, "
-                    "а значения — объекты с полями 'score' (число от 0 до 1, чем выше, "
-                    "тем лучше) и 'summary' (короткое объяснение на русском языке). "
-                    "Не добавляй никакого дополнительного текста."
+            prompt = fast_json.dumps(payload)
+
+            response = await self._chat_completion(
+                _L10N[lang]["system_teammate"],
+                prompt,
+                temperature=0.3,
+                max_tokens=400,
+                json_mode=True,
+            )
+            if response.status_code != 200:
+                logger.error(
+                    "Groq teammate match error: %s - %s",
+                    response.status_code,
+                    response.text,
                 )
-
-            prompt = json.dumps(payload, ensure_ascii=False)
-
-            headers = {
-                "Content-Type": "application/json",
-            }
-
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            if self._is_openrouter_base_url():
-                referer = getattr(settings, "WEBSITE_URL", "")
-                app_title = getattr(settings, "APP_TITLE", "Faceit AI Bot")
-                if referer:
-                    headers["HTTP-Referer"] = referer
-                headers["X-Title"] = app_title
-
-            request_payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": system_content,
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": 0.3,
-                "max_tokens": 400,
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.groq_base_url,
-                    headers=headers,
-                    json=request_payload,
-                ) as response:
-                    if response.status != 200:
-                        text = await response.text()
-                        logger.error(
-                            "Groq teammate match error: %s - %s",
-                            response.status,
-                            text,
-                        )
-                        return {}
-                    data = await response.json()
-                    content = data["choices"][0]["message"][
-                        "content"
-                    ]
-
-            text = content.strip()
-            if text.startswith("```"):
-                lines = text.splitlines()
-                cleaned_lines = [
-                    line
-                    for line in lines
-                    if not line.strip().startswith("```")
-                ]
-                text = "\n".join(cleaned_lines).strip()
-
-            try:
-                parsed = json.loads(text)
-                if isinstance(parsed, Dict):
-                    self._log_sample(
-                        task="teammates",
-                        language=lang,
-                        input_payload=payload,
-                        output_payload=parsed,
-                    )
-                    return parsed
                 return {}
-            except json.JSONDecodeError:
-                start = text.find("{")
-                end = text.rfind("}")
-                if start != -1 and end != -1 and end > start:
-                    try:
-                        parsed = json.loads(text[start : end + 1])
-                        if isinstance(parsed, Dict):
-                            self._log_sample(
-                                task="teammates",
-                                language=lang,
-                                input_payload=payload,
-                                output_payload=parsed,
-                            )
-                            return parsed
-                    except json.JSONDecodeError:
-                        logger.error(
-                            "Failed to parse teammate match JSON",
-                            exc_info=True,
-                        )
+            data = fast_json.loads(response.content)
+            content = data["choices"][0]["message"]["content"]
+
+            parsed = _extract_json_object(content)
+            if not isinstance(parsed, dict):
+                logger.error("Failed to parse teammate match JSON")
                 return {}
+            parsed = _validate_teammate_scores(parsed)
+
+            self._log_sample(
+                task="teammates",
+                language=lang,
+                input_payload=payload,
+                output_payload=parsed,
+            )
+            return parsed
         except Exception:
             logger.exception("Error in describe_teammate_matches")
             return {}
@@ -649,148 +1356,83 @@ class GroqService:
         when these fields are present in the stats dict.
         """
         lang = self._normalize_language(language)
-
+        texts = _L10N[lang]
+
+        # Only the number of matches goes into the prompt; key rounds are
+        # the variable-size part and are dropped last-first to fit the budget
+        fields = _PromptFields(stats)
+        fields["history"] = len(match_history)
+        max_key_moments = _MAX_PROMPT_KEY_MOMENTS
+        while True:
+            fields["extra"] = self._build_extra_context(stats, lang, max_key_moments)
+            prompt = texts["analysis_tmpl"].format_map(fields)
+            if (
+                max_key_moments == 0
+                or not stats.get("key_moments")
+                or _estimate_tokens(prompt) <= self.max_prompt_tokens
+            ):
+                return prompt
+            max_key_moments -= 1
+
+    def _build_extra_context(
+        self,
+        stats: Dict,
+        lang: str,
+        max_key_moments: int = 3,
+    ) -> str:
+        """Short optional context block (map, score, key rounds)."""
         map_name = stats.get("map_name")
         total_rounds = stats.get("total_rounds")
         score_team1 = stats.get("score_team1")
         score_team2 = stats.get("score_team2")
         key_moments = stats.get("key_moments") or []
 
-        # Build short optional context block (used mostly for demo analysis)
+        texts = _L10N[lang]
+
+        # Used mostly for demo analysis
         extra_context_lines: List[str] = []
         if map_name and map_name != "unknown":
-            if lang == "en":
-                extra_context_lines.append(f"Map: {map_name}")
-            else:
-                extra_context_lines.append(f"Карта: {map_name}")
+            extra_context_lines.append(texts["map"].format(map_name))
 
         if (isinstance(score_team1, (int, float)) and
                 isinstance(score_team2, (int, float)) and
                 total_rounds):
-            if lang == "en":
-                extra_context_lines.append(
-                    f"Final score: {int(score_team1)}:{int(score_team2)} "
-                    f"over {int(total_rounds)} rounds"
-                )
-            else:
-                extra_context_lines.append(
-                    f"Финальный счёт: {int(score_team1)}:{int(score_team2)} "
-                    f"за {int(total_rounds)} раундов"
+            extra_context_lines.append(
+                texts["score"].format(
+                    int(score_team1), int(score_team2), int(total_rounds)
                 )
+            )
 
         if key_moments and isinstance(key_moments, list):
-            # Use up to 3 key moments to keep prompt compact
+            # Use only a few key moments to keep prompt compact
             snippets: List[str] = []
-            for km in key_moments[:3]:
+            for km in key_moments[:max_key_moments]:
                 try:
                     rn = km.get("round")
                     desc = km.get("description")
                     if rn is not None and desc:
-                        if lang == "en":
-                            snippets.append(f"round {rn}: {desc}")
-                        else:
-                            snippets.append(f"раунд {rn}: {desc}")
+                        snippets.append(texts["round_kv"].format(rn, desc))
                 except Exception:
                     continue
             if snippets:
-                if lang == "en":
-                    extra_context_lines.append(
-                        "Key rounds in this match: " + "; ".join(snippets)
-                    )
-                else:
-                    extra_context_lines.append(
-                        "Ключевые раунды в этом матче: " + "; ".join(snippets)
-                    )
-
-        extra_context_block = "\n".join(extra_context_lines)
-
-        if lang == "en":
-            return f"""
-            Analyze CS2 player statistics (and demo context if present).
-
-            Current metrics:
-            - K/D: {stats.get('kd_ratio', 'N/A')}
-            - Headshot %: {stats.get('hs_percentage', 'N/A')}
-            - Win Rate: {stats.get('win_rate', 'N/A')}
-            - Average damage: {stats.get('avg_damage', 'N/A')}
-            - Matches played (or demos considered): {stats.get('matches_played', 'N/A')}
-
-            Recent matches (Faceit history): {len(match_history)}
-
-            {extra_context_block}
-
-            Provide a compact, structured analysis in ENGLISH:
-            1. Strengths of the player
-            2. Weaknesses
-            3. Specific recommendations for improvement (as a list)
-            4. Action plan for the next week
-            Use no more than 6 bullet points in total and keep the answer under 250 words.
-            """
-        else:
-            return f"""
-            Проанализируй статистику игрока CS2 (и контекст демки, если он есть).
+                extra_context_lines.append(
+                    texts["key_rounds"].format("; ".join(snippets))
+                )
 
-            Текущие показатели:
-            - K/D: {stats.get('kd_ratio', 'N/A')}
-            - Headshot %: {stats.get('hs_percentage', 'N/A')}
-            - Win Rate: {stats.get('win_rate', 'N/A')}
-            - Средний урон: {stats.get('avg_damage', 'N/A')}
-            - Сыграно матчей (или учтённых демок): {stats.get('matches_played', 'N/A')}
+        return "\n".join(extra_context_lines)
 
-            Количество недавних матчей (Faceit): {len(match_history)}
+    def _get_default_training_plan(self, language: str = "ru") -> Dict:
+        """Default training plan used when AI plan is unavailable."""
+        return fast_json.loads(
+            _DEFAULT_TRAINING_PLAN_JSON[self._normalize_language(language)]
+        )
 
-            {extra_context_block}
 
-            Дай компактный, структурированный анализ на РУССКОМ языке:
-            1. Сильные стороны игрока
-            2. Слабые стороны
-            3. Конкретные рекомендации по улучшению (списком)
-            4. План действий на ближайшую неделю
-            Используй не больше 6 пунктов всего и уложись примерно в 250 слов.
-            """
+@lru_cache(maxsize=1)
+def get_groq_service() -> GroqService:
+    """Process-wide GroqService built from the current settings.
 
-    def _get_default_training_plan(self, language: str = "ru") -> Dict:
-        """Default training plan used when AI plan is unavailable."""
-        lang = self._normalize_language(language)
-        if lang == "en":
-            return {
-                "focus_areas": ["aim", "game sense", "consistency"],
-                "daily_exercises": [
-                    {
-                        "name": "Aim Training",
-                        "duration": 30,
-                        "description": "Aim training on aim_botz",
-                    },
-                    {
-                        "name": "Spray Control",
-                        "duration": 20,
-                        "description": "Recoil control for AK-47 and M4A4",
-                    },
-                ],
-                "weekly_goals": [
-                    "Increase accuracy by 5%",
-                    "Improve K/D to 1.2",
-                ],
-                "estimated_time": "2-3 weeks",
-            }
-        else:
-            return {
-                "focus_areas": ["aim", "game sense", "consistency"],
-                "daily_exercises": [
-                    {
-                        "name": "Тренировка аима",
-                        "duration": 30,
-                        "description": "Тренировка аима на aim_botz и картах для практики",
-                    },
-                    {
-                        "name": "Контроль спрея",
-                        "duration": 20,
-                        "description": "Отработка отдачи на AK-47 и M4A4",
-                    },
-                ],
-                "weekly_goals": [
-                    "Увеличить точность стрельбы на 5%",
-                    "Довести K/D до 1.2",
-                ],
-                "estimated_time": "2-3 недели",
-            }
+    Tests that change provider settings should call
+    ``get_groq_service.cache_clear()`` afterwards.
+    """
+    return GroqService()
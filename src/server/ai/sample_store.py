@@ -1,10 +1,11 @@
-import json
+import asyncio
 import logging
 import os
 import threading
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Set
 
 from ..config.settings import settings
+from ..core import fast_json
 
 logger = logging.getLogger(__name__)
 
@@ -13,24 +14,94 @@ _lock = threading.Lock()
 AI_SAMPLES_DIR = getattr(settings, "AI_SAMPLES_DIR", "data")
 AI_SAMPLES_FILENAME = "ai_samples.jsonl"
 
+# Upper bound for samples waiting to be flushed to disk. When the disk is
+# slower than the request rate we drop samples instead of growing memory.
+MAX_PENDING_SAMPLES = 10_000
 
-def append_sample(record: Dict[str, Any]) -> None:
-    """Append a single AI training sample to a local JSONL file.
+_pending: List[str] = []
+_flush_loop: Optional[asyncio.AbstractEventLoop] = None
+_flush_futures: Set[asyncio.Future] = set()
 
-    Each line is a standalone JSON object with at least keys:
-    - task: str
-    - language: str
-    - input: dict
-    - output: any (string or structured JSON)
+
+def append_sample_lines(lines: List[str]) -> None:
+    """Append already serialized JSON samples (one per line) to the JSONL file.
+
+    All lines are written with a single open/write so that a burst of
+    samples costs one file operation instead of one per record.
     """
+    if not lines:
+        return
+
     try:
         os.makedirs(AI_SAMPLES_DIR, exist_ok=True)
         path = os.path.join(AI_SAMPLES_DIR, AI_SAMPLES_FILENAME)
-        line = json.dumps(record, ensure_ascii=False, default=str)
+        data = "".join(line + "\n" for line in lines)
 
         with _lock:
             with open(path, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
+                f.write(data)
     except Exception:
         # Never break main flow because of logging issues
         logger.exception("Failed to append AI sample to JSONL store")
+
+
+def append_sample(record: Dict[str, Any]) -> None:
+    """Append a single AI training sample to a local JSONL file.
+
+    Each line is a standalone JSON object with at least keys:
+    - task: str
+    - language: str
+    - input: dict
+    - output: any (string or structured JSON)
+    """
+    try:
+        line = fast_json.dumps(record)
+    except Exception:
+        logger.exception("Failed to serialize AI sample")
+        return
+    append_sample_lines([line])
+
+
+def enqueue_sample_line(line: str) -> None:
+    """Schedule an already serialized sample to be persisted.
+
+    Samples queued during the same loop iteration are flushed together in
+    the default thread executor. Outside of a running event loop the sample
+    is written synchronously.
+    """
+    global _flush_loop
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        append_sample_lines([line])
+        return
+
+    if len(_pending) >= MAX_PENDING_SAMPLES:
+        logger.warning("AI sample queue is full, dropping sample")
+        return
+
+    _pending.append(line)
+    # Compare against the loop that owns the pending flush so that a flush
+    # lost together with a closed loop does not block future writes.
+    if _flush_loop is not loop:
+        _flush_loop = loop
+        loop.call_soon(_flush_pending, loop)
+
+
+def _flush_pending(loop: asyncio.AbstractEventLoop) -> None:
+    global _flush_loop
+
+    batch = list(_pending)
+    _pending.clear()
+    _flush_loop = None
+
+    try:
+        future = loop.run_in_executor(None, append_sample_lines, batch)
+    except RuntimeError:
+        # Executor is already shut down (e.g. during loop teardown)
+        append_sample_lines(batch)
+        return
+
+    _flush_futures.add(future)
+    future.add_done_callback(_flush_futures.discard)
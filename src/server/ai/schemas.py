@@ -0,0 +1,42 @@
+"""
+AI Response Schemas
+Validation schemas for structured LLM replies
+"""
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict
+
+
+class LLMReply(BaseModel):
+    """Base schema for model replies; unknown fields are kept as-is"""
+    model_config = ConfigDict(extra="allow")
+
+
+class TrainingExercise(LLMReply):
+    """Single daily exercise of a training plan"""
+    name: str
+    duration: Union[str, int, float]
+    description: str
+
+
+class TrainingPlanReply(LLMReply):
+    """Training plan returned by the model"""
+    daily_exercises: List[TrainingExercise]
+    weekly_goals: List[str]
+    estimated_time: str
+
+
+class DemoCoachReportReply(LLMReply):
+    """Demo coach report returned by the model"""
+    overview: Optional[str] = None
+    strengths: Optional[Union[List[Any], Dict[str, Any]]] = None
+    weaknesses: Optional[Union[List[Any], Dict[str, Any]]] = None
+    key_moments: Optional[Union[List[Any], Dict[str, Any]]] = None
+    training_plan: Optional[Union[List[Any], Dict[str, Any]]] = None
+    summary: Optional[str] = None
+
+
+class TeammateScoreReply(LLMReply):
+    """Compatibility verdict for one teammate candidate"""
+    score: Optional[float] = None
+    summary: Optional[str] = None
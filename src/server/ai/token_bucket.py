@@ -0,0 +1,94 @@
+"""
+Client-side rate limiting for LLM providers
+
+Token buckets that delay outgoing requests locally instead of spending a
+round-trip on a 429 when the provider's RPM/TPM limits are reached.
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+
+class AsyncTokenBucket:
+    """Token bucket refilled continuously at ``rate_per_s`` up to ``burst``."""
+
+    def __init__(self, rate_per_s: float, burst: float):
+        if rate_per_s <= 0 or burst <= 0:
+            raise ValueError("rate_per_s and burst must be positive")
+        self.rate_per_s = float(rate_per_s)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        # Limiters are process-wide but asyncio locks belong to one event
+        # loop, so the lock is recreated when the running loop changes
+        # (between test cases, asyncio.run in worker tasks, bot restarts).
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate_per_s)
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Wait until ``tokens`` are available and consume them.
+
+        Requests larger than the bucket are clamped to ``burst`` so they are
+        throttled rather than blocked forever. Waiters are served in FIFO
+        order because the lock is held while sleeping.
+        """
+        needed = min(float(tokens), self.burst)
+        async with self._get_lock():
+            self._refill()
+            if self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate_per_s)
+                self._refill()
+            self._tokens -= needed
+
+
+class ModelRateLimiter:
+    """Combined requests-per-minute and tokens-per-minute limits for a model."""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.requests: Optional[AsyncTokenBucket] = (
+            AsyncTokenBucket(rpm / 60.0, rpm) if rpm > 0 else None
+        )
+        self.tokens: Optional[AsyncTokenBucket] = (
+            AsyncTokenBucket(tpm / 60.0, tpm) if tpm > 0 else None
+        )
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None:
+            await self.tokens.acquire(estimated_tokens)
+
+
+_limiters: Dict[Tuple[str, int, int], ModelRateLimiter] = {}
+
+
+def get_model_rate_limiter(
+    model: str,
+    rpm: int = 0,
+    tpm: int = 0,
+) -> Optional[ModelRateLimiter]:
+    """Return the process-wide limiter for ``model`` or None if disabled.
+
+    Limiters are shared between service instances so that every caller of
+    the same model draws from one budget.
+    """
+    if rpm <= 0 and tpm <= 0:
+        return None
+    key = (model, rpm, tpm)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = ModelRateLimiter(rpm=rpm, tpm=tpm)
+    return limiter
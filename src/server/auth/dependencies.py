@@ -1,49 +1,172 @@
 """FastAPI auth dependencies"""
-from typing import Optional
+from typing import Any, Dict, Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from .security import decode_access_token
+from ..core.memory_cache import TTLCache
 from ..database.models import User
 from ..database.connection import get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
+# Column values of recently authenticated users keyed by id. A hit is
+# attached to the request's session with merge(load=False), so the request
+# gets a normal User without a SELECT. ORM updates evict the entry, but only
+# in this process: the TTL bounds how long another worker can keep serving
+# a deactivated or demoted user (is_active / is_admin), so it stays short.
+_USER_CACHE_TTL = 2.0
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=_USER_CACHE_TTL)
+# Password hashes are never cached; an attached user loads it on access.
+_USER_COLUMNS = tuple(
+    attr.key for attr in inspect(User).column_attrs if attr.key != "hashed_password"
+)
+
+# Login lookups keyed by email, including misses (stored as False). The TTL
+# is kept short so that out-of-ORM changes are visible within 2 seconds;
+# ORM inserts/updates/deletes evict the entry immediately.
+_EMAIL_CACHE_TTL = 2.0
+_email_cache: TTLCache = TTLCache(maxsize=10_000, ttl=_EMAIL_CACHE_TTL)
+
+
+def invalidate_cached_user(user_id: Any, email: Optional[str] = None) -> None:
+    """Drop a user from the auth caches (e.g. after an out-of-ORM update)."""
+    _user_cache.pop(int(user_id), None)
+    if email is not None:
+        _email_cache.pop(email, None)
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_cached_user(mapper: Any, connection: Any, target: User) -> None:
+    if target.id is not None:
+        invalidate_cached_user(target.id)
+    # Both the current and a just-replaced email may be cached
+    state = inspect(target)
+    for email in (state.dict.get("email"), *(state.attrs.email.history.deleted or ())):
+        if email is not None:
+            _email_cache.pop(email, None)
+
+
+def _attach_cached(db: Session, values: Dict[str, Any]) -> User:
+    cached = User(**values)
+    make_transient_to_detached(cached)
+    return db.merge(cached, load=False)
+
+
+def load_user_values(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    """Return the column values of user ``user_id`` for read-only use.
+
+    A cache hit costs no query and no ORM instance at all.
+    """
+    values: Optional[Dict[str, Any]] = _user_cache.get(user_id)
+    if values is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        values = {key: getattr(user, key) for key in _USER_COLUMNS}
+        _user_cache.set(user_id, values)
+    return values
+
+
+def load_user(db: Session, user_id: int) -> Optional[User]:
+    """Return the user with ``user_id``, served from the auth cache when possible."""
+    values: Optional[Dict[str, Any]] = _user_cache.get(user_id)
+    if values is not None:
+        return _attach_cached(db, values)
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is not None:
+        _user_cache.set(user_id, {key: getattr(user, key) for key in _USER_COLUMNS})
+    return user
 
-async def get_current_user(
-    request: Request,
-    token: Optional[str] = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+
+def load_user_by_email(db: Session, email: str) -> Optional[User]:
+    """Return the user with ``email`` for login, served from a short L1 cache.
+
+    The password hash is loaded here, in the caller's thread, so that the
+    login route can read it without touching the database on the event loop.
+    """
+    values = _email_cache.get(email)
+    if values is False:
+        return None
+    if values is not None:
+        user = _attach_cached(db, values)
+        db.refresh(user, attribute_names=["hashed_password"])
+        return user
+
+    user = db.query(User).filter(User.email == email).first()
+    _email_cache.set(
+        email,
+        {key: getattr(user, key) for key in _USER_COLUMNS} if user is not None else False,
+    )
+    return user
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _authenticated_user_id(request: Request, token: Optional[str]) -> int:
+    """User id from the bearer token or access_token cookie, else 401."""
     if not token:
         token = request.cookies.get("access_token")
 
     if not token:
-        raise credentials_exception
+        raise _credentials_exception()
 
     payload = decode_access_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
-    user_id: Optional[int] = payload.get("sub")
+    user_id = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return int(user_id)
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+
+async def get_current_user(
+    request: Request,
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user"""
+    user_id = _authenticated_user_id(request, token)
+    user = load_user(db, user_id)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     request.state.user_id = str(user.id)
     return user
 
 
+async def get_current_active_user_values(
+    request: Request,
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Column values of the current active user, for read-only endpoints.
+
+    Same checks as get_current_active_user, but served from the auth cache
+    without building a User or merging it into the session.
+    """
+    user_id = _authenticated_user_id(request, token)
+    values = load_user_values(db, user_id)
+    if values is None:
+        raise _credentials_exception()
+    if not values["is_active"]:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    request.state.user_id = str(values["id"])
+    return values
+
+
 async def get_optional_current_user(
     request: Request,
     token: Optional[str] = Depends(oauth2_scheme),
@@ -67,8 +190,7 @@ async def get_optional_current_user(
     if user_id is None:
         return None
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    return user
+    return load_user(db, int(user_id))
 
 
 async def get_current_active_user(
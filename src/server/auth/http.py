@@ -0,0 +1,66 @@
+"""Shared HTTP session for Steam and FACEIT auth calls"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Fail fast on connect so a slow Steam/FACEIT host can't hold the login open
+_TIMEOUT = aiohttp.ClientTimeout(total=5, sock_connect=1, sock_read=4)
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_http() -> aiohttp.ClientSession:
+    """Return the process-wide auth HTTP session for the running event loop.
+
+    Login callbacks talk to the same few hosts (Steam OpenID, Steam Web API,
+    FACEIT OAuth), so a pooled keep-alive session saves a TCP + TLS
+    handshake per call. The session is recreated if the event loop changed.
+    """
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=20,
+                keepalive_timeout=30,
+                ttl_dns_cache=600,
+            ),
+            timeout=_TIMEOUT,
+        )
+        _session_loop = loop
+    return _session
+
+
+async def warmup_http(*urls: str) -> None:
+    """Open pooled connections to ``urls`` ahead of the first login.
+
+    DNS, TCP and TLS are paid at startup so the first callback only costs
+    one round-trip. Failures are ignored; real requests simply connect.
+    """
+    session = await get_http()
+    for url in urls:
+        try:
+            # Exiting the context returns the connection to the pool
+            async with session.head(url):
+                pass
+        except Exception:
+            logger.debug("Auth HTTP warmup failed for %s", url, exc_info=True)
+
+
+async def close_http() -> None:
+    """Close the shared auth HTTP session (called on application shutdown)."""
+    global _session, _session_loop
+
+    session = _session
+    _session = None
+    _session_loop = None
+    if session is not None and not session.closed:
+        await session.close()
@@ -1,5 +1,6 @@
 """Authentication endpoints"""
 
+import asyncio
 from datetime import datetime, timedelta
 import logging
 import secrets
@@ -7,27 +8,49 @@ import hashlib
 import base64
 import re
 from urllib.parse import urlencode
+from collections.abc import Mapping
 from typing import Any, cast
 
 import aiohttp
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
-from fastapi.responses import RedirectResponse
-from sqlalchemy import select
+import jwt
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    status,
+    Request,
+    Response,
+)
+from fastapi.responses import JSONResponse, RedirectResponse
+from sqlalchemy import func, insert, literal, or_, select, update
 from sqlalchemy.orm import Session
 
 from .schemas import Token, UserResponse, SteamLinkRequest
 from .security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     decode_access_token,
     create_refresh_token,
     hash_refresh_token,
+    UNUSABLE_PASSWORD_HASH,
+)
+from .dependencies import (
+    get_current_active_user,
+    get_current_active_user_values,
+    invalidate_cached_user,
+    load_user,
+    load_user_by_email,
 )
-from .dependencies import get_current_active_user
+from .http import get_http
+from . import session_store
 from ..config.settings import settings
+from ..core import fast_json
+from ..core.memory_cache import TTLCache
+from ..core.timeutil import utcnow
 from ..middleware.rate_limiter import rate_limiter
-from ..database.connection import get_db
+from ..database.connection import SessionLocal, get_db
 from ..database.models import (
     User,
     Subscription,
@@ -47,6 +70,52 @@ STEAM_API_PLAYER_SUMMARIES_URL = "https://api.steampowered.com/ISteamUser/GetPla
 FACEIT_AUTHORIZATION_URL = "https://accounts.faceit.com"
 FACEIT_TOKEN_URL = "https://api.faceit.com/auth/v1/oauth/token"
 FACEIT_USERINFO_URL = "https://api.faceit.com/auth/v1/resources/userinfo"
+FACEIT_ID_TOKEN_ISSUER = "https://api.faceit.com/auth"
+
+# FACEIT Data API player lookups for teammate profile sync, keyed by nickname
+_faceit_player_cache: TTLCache = TTLCache(maxsize=4096, ttl=300.0)
+
+# Steam persona names keyed by steam_id. They rarely change, so returning
+# users skip the GetPlayerSummaries call on login; failures aren't cached.
+_steam_persona_cache: TTLCache = TTLCache(maxsize=10_000, ttl=3 * 60 * 60.0)
+
+# Derived from settings once; they don't change while the process runs
+_WEBSITE_BASE = settings.WEBSITE_URL.rstrip("/")
+_WEBSITE_IS_HTTPS = settings.WEBSITE_URL.startswith("https://")
+_INSECURE_COOKIE_HOSTS = frozenset({"testserver", "localhost"})
+# Browser-extension origins log in without a captcha; str.startswith takes
+# the whole tuple in one C-level call
+_CAPTCHA_EXEMPT_ORIGIN_PREFIXES = ("chrome-extension://",)
+_REFRESH_EXPIRE_DELTA = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+_REFRESH_MAX_AGE = int(_REFRESH_EXPIRE_DELTA.total_seconds())
+_ACCESS_COOKIE_MAX_AGE = 60 * 60 * 24 * 30
+_FACEIT_REDIRECT_URI = f"{_WEBSITE_BASE}/api/auth/faceit/callback"
+
+# Constant parts of the login redirect query strings, encoded once
+_STEAM_OPENID_IDENTIFIER_SELECT = "http://specs.openid.net/auth/2.0/identifier_select"
+_STEAM_OPENID_STATIC_QUERY = urlencode(
+    {
+        "openid.ns": "http://specs.openid.net/auth/2.0",
+        "openid.mode": "checkid_setup",
+        "openid.identity": _STEAM_OPENID_IDENTIFIER_SELECT,
+        "openid.claimed_id": _STEAM_OPENID_IDENTIFIER_SELECT,
+    }
+)
+_FACEIT_AUTHORIZE_STATIC_QUERY = urlencode(
+    {
+        "response_type": "code",
+        "scope": "openid email profile",
+        "code_challenge_method": "S256",
+    }
+)
+
+# Nginx adds /api prefix for backend, so callback is exposed as /api/auth/steam/callback
+_STEAM_LOGIN_URL = f"{STEAM_OPENID_URL}?{_STEAM_OPENID_STATIC_QUERY}&" + urlencode(
+    {
+        "openid.return_to": f"{_WEBSITE_BASE}/api/auth/steam/callback",
+        "openid.realm": _WEBSITE_BASE,
+    }
+)
 
 
 def _make_unique_username(
@@ -55,20 +124,377 @@ def _make_unique_username(
     *,
     exclude_user_id: int | None = None,
 ) -> str:
+    # Fetch the base name and every "<base>_<suffix>" variant in one query,
+    # then pick the first free candidate in Python
+    like_base = (
+        base_username.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+    taken = dict(
+        db.execute(
+            select(User.username, User.id).where(
+                or_(
+                    User.username == base_username,
+                    User.username.like(f"{like_base}\\_%", escape="\\"),
+                )
+            )
+        ).all()
+    )
+
     username = base_username
     suffix = 1
     while True:
-        existing = db.execute(
-            select(User).where(User.username == username)
-        ).scalars().first()
-        if not existing:
+        owner_id = taken.get(username)
+        if owner_id is None:
             return username
-        if exclude_user_id is not None and getattr(existing, "id", None) == exclude_user_id:
+        if exclude_user_id is not None and owner_id == exclude_user_id:
             return username
         username = f"{base_username}_{suffix}"
         suffix += 1
 
 
+def _build_refresh_session(
+    user_id: int,
+    request: Request,
+    now: datetime | None = None,
+) -> tuple[str, dict[str, Any]]:
+    """Mint a refresh token and the user_sessions row values that store its hash.
+
+    Pass ``now`` to share one timestamp with the rest of the request.
+    """
+    refresh_token = create_refresh_token()
+    if now is None:
+        now = utcnow()
+    row = {
+        "user_id": user_id,
+        "token_hash": hash_refresh_token(refresh_token),
+        "created_at": now,
+        "expires_at": now + _REFRESH_EXPIRE_DELTA,
+        "user_agent": (request.headers.get("user-agent") or "")[:255],
+        "ip_address": request.client.host if request.client else None,
+    }
+    return refresh_token, row
+
+
+def _store_refresh_session(db: Session, row: dict[str, Any], context: str) -> bool:
+    """Insert a refresh session row; on failure log it and return False.
+
+    A Core INSERT: the row is never read back, so there is no reason to go
+    through the ORM unit of work. A missing refresh session only means no
+    refresh cookie is set, so it never fails the login itself.
+    """
+    try:
+        db.execute(insert(UserSession).values(row))
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logger.error(
+            "Failed to create refresh session for user %s during %s: %s",
+            row["user_id"],
+            context,
+            exc,
+        )
+        return False
+    return True
+
+
+async def _persist_refresh_session(db: Session, row: dict[str, Any], context: str) -> bool:
+    """Store a refresh session off the event loop and index it in Redis."""
+    stored = await asyncio.to_thread(_store_refresh_session, db, row, context)
+    if stored:
+        await session_store.remember(row["token_hash"], row["user_id"], row["expires_at"])
+    return stored
+
+
+def _set_auth_cookies(
+    response: Response,
+    request: Request,
+    access_token: str,
+    refresh_token: str | None,
+) -> None:
+    """Set the httpOnly access (and, if given, refresh) token cookies."""
+    secure = _WEBSITE_IS_HTTPS and request.url.hostname not in _INSECURE_COOKIE_HOSTS
+    response.set_cookie(
+        key="access_token",
+        value=access_token,
+        httponly=True,
+        secure=secure,
+        samesite="none",
+        max_age=_ACCESS_COOKIE_MAX_AGE,
+    )
+    if refresh_token is not None:
+        response.set_cookie(
+            key="refresh_token",
+            value=refresh_token,
+            httponly=True,
+            secure=secure,
+            samesite="none",
+            max_age=_REFRESH_MAX_AGE,
+        )
+
+
+def _record_login(user_id: int, email: str) -> None:
+    """Bump last_login/login_count (runs as a background task after login).
+
+    Uses a server-side increment, so concurrent logins don't lose counts.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                last_login=utcnow(),
+                login_count=func.coalesce(User.login_count, 0) + 1,
+            )
+        )
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logger.error("Failed to update login activity for user %s: %s", user_id, exc)
+    finally:
+        db.close()
+    # Core UPDATE bypasses the ORM events that normally evict these entries
+    invalidate_cached_user(user_id, email)
+
+
+def _has_letter_and_digit(password: str) -> bool:
+    """Single pass over the distinct characters; Unicode letters count."""
+    has_letter = has_digit = False
+    for char in set(password):
+        if char.isdigit():
+            has_digit = True
+        elif char.isalpha():
+            has_letter = True
+        if has_letter and has_digit:
+            return True
+    return False
+
+
+def _get_or_create_steam_user(
+    db: Session,
+    steam_id: str,
+    persona_name: str | None,
+) -> User:
+    """Find or create the user for ``steam_id`` and record the login.
+
+    Sync Session work; called via ``asyncio.to_thread``.
+    """
+    user = db.execute(
+        select(User).where(User.steam_id == steam_id)
+    ).scalars().first()
+
+    if not user:
+        base_username = persona_name or f"steam_{steam_id}"
+        username = _make_unique_username(db, base_username)
+
+        email = f"steam_{steam_id}@steam.local"
+        hashed_password = UNUSABLE_PASSWORD_HASH
+
+        user = User(
+            email=email,
+            username=username,
+            hashed_password=hashed_password,
+            steam_id=steam_id,
+        )
+        db.add(user)
+        # Flush to get user.id; user, subscription and login activity are
+        # committed together below
+        db.flush()
+
+        db.add(Subscription(user_id=user.id, tier=SubscriptionTier.FREE))
+    else:
+        if not user.steam_id:
+            user_obj_steam: Any = user
+            user_obj_steam.steam_id = steam_id
+
+        if persona_name and user.username:
+            legacy_pattern = rf"steam_{re.escape(steam_id)}(?:_\d+)?$"
+            if re.fullmatch(legacy_pattern, user.username):
+                candidate = _make_unique_username(
+                    db,
+                    persona_name,
+                    exclude_user_id=user.id,
+                )
+                if candidate != user.username:
+                    user_obj_username: Any = user
+                    user_obj_username.username = candidate
+
+    user_obj: Any = user
+    user_obj.last_login = utcnow()
+    user_obj.login_count = (user_obj.login_count or 0) + 1
+    db.commit()
+    db.refresh(user)
+
+    return user
+
+
+def _get_or_create_faceit_user(
+    db: Session,
+    faceit_guid: str,
+    email: str | None,
+    nickname: str,
+) -> User:
+    """Find, link or create the user for a FACEIT account and record the login.
+
+    Sync Session work; called via ``asyncio.to_thread``.
+    """
+    # Look up users by faceit_id and by email in a single round-trip
+    condition = User.faceit_id == faceit_guid
+    if email:
+        condition = or_(condition, User.email == email)
+    candidates = db.execute(select(User).where(condition)).scalars().all()
+
+    user = next((u for u in candidates if u.faceit_id == faceit_guid), None)
+
+    if not user and email:
+        # Try to link to existing account with same email
+        user = next((u for u in candidates if u.email == email), None)
+        if user and user.faceit_id and user.faceit_id != faceit_guid:
+            logger.warning(
+                "Email %s already linked to a different FACEIT id %s",
+                email,
+                user.faceit_id,
+            )
+            raise HTTPException(
+                status_code=400,
+                detail="This email is already linked to another Faceit account",
+            )
+
+    if not user:
+        # Create synthetic email if needed (a taken email was linked above)
+        if not email:
+            email = f"faceit_{faceit_guid}@faceit.local"
+
+        # Ensure unique username
+        base_username = nickname
+        username = _make_unique_username(db, base_username)
+
+        hashed_password = UNUSABLE_PASSWORD_HASH
+
+        user = User(
+            email=email,
+            username=username,
+            hashed_password=hashed_password,
+            faceit_id=faceit_guid,
+        )
+        db.add(user)
+        # Flush to get user.id; user, subscription and login activity are
+        # committed together below
+        db.flush()
+
+        db.add(Subscription(user_id=user.id, tier=SubscriptionTier.FREE))
+    else:
+        # Link FACEIT account if not already linked
+        if not user.faceit_id:
+            user_obj_faceit: Any = user
+            user_obj_faceit.faceit_id = faceit_guid
+
+        if nickname and user.username:
+            legacy_pattern = rf"faceit_{re.escape(faceit_guid)}(?:_\d+)?$"
+            if re.fullmatch(legacy_pattern, user.username):
+                candidate = _make_unique_username(
+                    db,
+                    nickname,
+                    exclude_user_id=user.id,
+                )
+                if candidate != user.username:
+                    user_obj_username: Any = user
+                    user_obj_username.username = candidate
+
+    user_obj: Any = user
+    user_obj.last_login = utcnow()
+    user_obj.login_count = (user_obj.login_count or 0) + 1
+    db.commit()
+    db.refresh(user)
+
+    return user
+
+
+def _save_teammate_profile(
+    user_id: int,
+    nickname: str,
+    elo: int | None,
+    level: int | None,
+) -> None:
+    db = SessionLocal()
+    try:
+        profile = (
+            db.query(TeammateProfileDB)
+            .filter(TeammateProfileDB.user_id == user_id)
+            .first()
+        )
+        if not profile:
+            profile = TeammateProfileDB(user_id=user_id)
+            db.add(profile)
+
+        profile_obj: Any = profile
+        profile_obj.faceit_nickname = nickname
+        if elo is not None:
+            profile_obj.elo = elo
+        if level is not None:
+            profile_obj.level = level
+        profile_obj.updated_at = utcnow()
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def _sync_teammate_profile(user_id: int, nickname: str) -> None:
+    """Sync teammate search profile with Faceit data (runs as a background task)."""
+    try:
+        faceit_player = _faceit_player_cache.get(nickname)
+        if faceit_player is None:
+            from ..integrations.faceit_client import get_faceit_client
+
+            faceit_player = await get_faceit_client().get_player_by_nickname(nickname)
+            if isinstance(faceit_player, dict):
+                _faceit_player_cache.set(nickname, faceit_player)
+
+        elo = None
+        level = None
+        if isinstance(faceit_player, dict):
+            game_data = (faceit_player.get("games") or {}).get("cs2") or {}
+            elo = game_data.get("faceit_elo")
+            level = game_data.get("skill_level")
+
+        await asyncio.to_thread(_save_teammate_profile, user_id, nickname, elo, level)
+    except Exception:
+        logger.exception("Failed to sync teammate profile from Faceit on login")
+
+
+def _faceit_claims_from_id_token(id_token: Any, client_id: str) -> dict | None:
+    """Return profile claims from a FACEIT id_token, or None if unusable.
+
+    The token comes straight from the FACEIT token endpoint over TLS, so its
+    signature is not re-verified; iss, aud and exp still are (OpenID Connect
+    Core 3.1.3.7). Callers fall back to the userinfo endpoint on None.
+    """
+    if not isinstance(id_token, str) or not id_token:
+        return None
+    try:
+        claims = jwt.decode(
+            id_token,
+            audience=client_id,
+            issuer=FACEIT_ID_TOKEN_ISSUER,
+            options={
+                "verify_signature": False,
+                "verify_aud": True,
+                "verify_iss": True,
+                "verify_exp": True,
+                "require": ["iss", "aud", "exp"],
+            },
+        )
+    except jwt.InvalidTokenError:
+        return None
+    if not (claims.get("guid") or claims.get("sub")) or not claims.get("nickname"):
+        return None
+    return claims
+
+
 async def verify_steam_openid(query_params) -> str | None:
     """Verify Steam OpenID response and return steam_id if valid.
 
@@ -76,34 +502,33 @@ async def verify_steam_openid(query_params) -> str | None:
     `check_authentication` mode and checks for `is_valid:true` in response.
     """
 
-    params = dict(query_params)
+    params = query_params
 
     # Basic sanity check
     if params.get("openid.mode") not in {"id_res", "checkid_immediate", "checkid_setup"}:
         return None
 
+    signed = params.get("openid.signed", "")
     payload = {
         "openid.ns": "http://specs.openid.net/auth/2.0",
         "openid.mode": "check_authentication",
         "openid.assoc_handle": params.get("openid.assoc_handle", ""),
-        "openid.signed": params.get("openid.signed", ""),
+        "openid.signed": signed,
         "openid.sig": params.get("openid.sig", ""),
     }
 
-    signed = params.get("openid.signed", "")
     for var in signed.split(","):
         key = f"openid.{var}"
         if key in params:
             payload[key] = params[key]
 
     try:
-        timeout = aiohttp.ClientTimeout(total=5)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(STEAM_OPENID_URL, data=payload) as resp:
-                text = await resp.text()
-                if "is_valid:true" not in text:
-                    logger.warning("Steam OpenID validation failed: %s", text.strip())
-                    return None
+        session = await get_http()
+        async with session.post(STEAM_OPENID_URL, data=payload) as resp:
+            text = await resp.text()
+            if "is_valid:true" not in text:
+                logger.warning("Steam OpenID validation failed: %s", text.strip())
+                return None
     except Exception as e:  # pragma: no cover - network errors are logged
         logger.error("Steam OpenID verification error: %s", str(e))
         return None
@@ -113,7 +538,7 @@ async def verify_steam_openid(query_params) -> str | None:
         return None
 
     # Example: https://steamcommunity.com/openid/id/76561198000000000
-    steam_id = claimed_id.rstrip("/").split("/")[-1]
+    steam_id = claimed_id.rstrip("/").rpartition("/")[2]
     return steam_id or None
 
 
@@ -122,27 +547,30 @@ async def fetch_steam_persona_name(steam_id: str) -> str | None:
     if not api_key:
         return None
 
+    cached = _steam_persona_cache.get(steam_id)
+    if cached is not None:
+        return cached
+
     params = {
         "key": api_key,
         "steamids": steam_id,
     }
 
     try:
-        timeout = aiohttp.ClientTimeout(total=5)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(
-                STEAM_API_PLAYER_SUMMARIES_URL,
-                params=params,
-            ) as resp:
-                if resp.status != 200:
-                    text = await resp.text()
-                    logger.warning(
-                        "Steam GetPlayerSummaries error %s: %s",
-                        resp.status,
-                        text,
-                    )
-                    return None
-                data = await resp.json()
+        session = await get_http()
+        async with session.get(
+            STEAM_API_PLAYER_SUMMARIES_URL,
+            params=params,
+        ) as resp:
+            if resp.status != 200:
+                text = await resp.text()
+                logger.warning(
+                    "Steam GetPlayerSummaries error %s: %s",
+                    resp.status,
+                    text,
+                )
+                return None
+            data = await resp.json(loads=fast_json.loads)
     except Exception as e:  # pragma: no cover - network errors are logged
         logger.error("Steam GetPlayerSummaries request error: %s", str(e))
         return None
@@ -155,10 +583,11 @@ async def fetch_steam_persona_name(steam_id: str) -> str | None:
     if not persona_name:
         return None
 
+    _steam_persona_cache.set(steam_id, str(persona_name))
     return str(persona_name)
 
 
-@router.get("/steam/login")
+@router.get("/steam/login", response_class=RedirectResponse)
 async def steam_login(request: Request):
     """Redirect user to Steam OpenID for authentication.
 
@@ -186,24 +615,10 @@ async def steam_login(request: Request):
                 detail="CAPTCHA verification failed",
             )
 
-    realm = settings.WEBSITE_URL.rstrip("/")
-    # Nginx adds /api prefix for backend, so callback is exposed as /api/auth/steam/callback
-    return_to = f"{realm}/api/auth/steam/callback"
-
-    params = {
-        "openid.ns": "http://specs.openid.net/auth/2.0",
-        "openid.mode": "checkid_setup",
-        "openid.return_to": return_to,
-        "openid.realm": realm,
-        "openid.identity": "http://specs.openid.net/auth/2.0/identifier_select",
-        "openid.claimed_id": "http://specs.openid.net/auth/2.0/identifier_select",
-    }
-
-    url = f"{STEAM_OPENID_URL}?{urlencode(params)}"
-    return RedirectResponse(url)
+    return RedirectResponse(_STEAM_LOGIN_URL)
 
 
-@router.get("/steam/callback")
+@router.get("/steam/callback", response_class=RedirectResponse)
 async def steam_callback(
     request: Request,
     db: Session = Depends(get_db),
@@ -220,127 +635,30 @@ async def steam_callback(
             detail="Invalid Steam OpenID response",
         )
 
-    user = db.execute(
-        select(User).where(User.steam_id == steam_id)
-    ).scalars().first()
-
-    if not user:
-        persona_name = await fetch_steam_persona_name(steam_id)
-        base_username = persona_name or f"steam_{steam_id}"
-        username = _make_unique_username(db, base_username)
-
-        email = f"steam_{steam_id}@steam.local"
-        random_password = secrets.token_urlsafe(16)
-        hashed_password = get_password_hash(random_password)
-
-        user = User(
-            email=email,
-            username=username,
-            hashed_password=hashed_password,
-            steam_id=steam_id,
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-        subscription = Subscription(user_id=user.id, tier=SubscriptionTier.FREE)
-        db.add(subscription)
-        db.commit()
-    else:
-        updated = False
-
-        if not user.steam_id:
-            user_obj_steam: Any = user
-            user_obj_steam.steam_id = steam_id
-            updated = True
-
-        persona_name = await fetch_steam_persona_name(steam_id)
-        if persona_name and user.username:
-            legacy_pattern = rf"steam_{re.escape(steam_id)}(?:_\d+)?$"
-            if re.fullmatch(legacy_pattern, user.username):
-                candidate = _make_unique_username(
-                    db,
-                    persona_name,
-                    exclude_user_id=user.id,
-                )
-                if candidate != user.username:
-                    user_obj_username: Any = user
-                    user_obj_username.username = candidate
-                    updated = True
-
-        if updated:
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-
-    try:
-        user_obj: Any = user
-        user_obj.last_login = datetime.utcnow()
-        user_obj.login_count = (user_obj.login_count or 0) + 1
-        db.add(user_obj)
-        db.commit()
-    except Exception as exc:
-        db.rollback()
-        logger.error(
-            "Failed to update login activity for user %s via Steam: %s",
-            user.id,
-            exc,
-        )
+    persona_name = await fetch_steam_persona_name(steam_id)
+    # Sync Session I/O runs in a worker thread so it doesn't block the loop
+    user = await asyncio.to_thread(_get_or_create_steam_user, db, steam_id, persona_name)
 
     access_token = create_access_token(data={"sub": str(user.id)})
-    refresh_token = create_refresh_token()
-    refresh_hash = hash_refresh_token(refresh_token)
-    now = datetime.utcnow()
-    session: UserSession | None = UserSession(
-        user_id=user.id,
-        token_hash=refresh_hash,
-        created_at=now,
-        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        user_agent=(request.headers.get("user-agent") or "")[:255],
-        ip_address=request.client.host if request.client else None,
-    )
-    try:
-        db.add(session)
-        db.commit()
-    except Exception as exc:
-        db.rollback()
-        logger.error(
-            "Failed to create refresh session for user %s during Steam callback: %s",
-            user.id,
-            exc,
-        )
-        session = None
+    refresh_token, session_row = _build_refresh_session(user.id, request)
+    stored = await _persist_refresh_session(db, session_row, "Steam callback")
 
-    secure_cookie = settings.WEBSITE_URL.startswith("https://") and (
-        request.url.hostname not in ("testserver", "localhost")
-    )
-    redirect_url = f"{settings.WEBSITE_URL.rstrip('/')}/auth?steam_token={access_token}"
+    redirect_url = f"{_WEBSITE_BASE}/auth?steam_token={access_token}"
     redirect_response = RedirectResponse(
         url=redirect_url,
         status_code=status.HTTP_302_FOUND,
     )
-    redirect_response.set_cookie(
-        key="access_token",
-        value=access_token,
-        httponly=True,
-        secure=secure_cookie,
-        samesite="none",
-        max_age=60 * 60 * 24 * 30,
+    _set_auth_cookies(
+        redirect_response,
+        request,
+        access_token,
+        refresh_token if stored else None,
     )
-    if session is not None:
-        redirect_response.set_cookie(
-            key="refresh_token",
-            value=refresh_token,
-            httponly=True,
-            secure=secure_cookie,
-            samesite="none",
-            max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
-        )
 
     return redirect_response
 
 
-@router.get("/faceit/login")
+@router.get("/faceit/login", response_class=RedirectResponse)
 async def faceit_login(request: Request):
     """Redirect user to FACEIT OAuth2 for authentication.
 
@@ -379,13 +697,14 @@ async def faceit_login(request: Request):
             detail="Faceit OAuth is not configured",
         )
 
-    redirect_uri = f"{settings.WEBSITE_URL.rstrip('/')}/api/auth/faceit/callback"
+    redirect_uri = _FACEIT_REDIRECT_URI
 
     # PKCE: generate code_verifier and code_challenge (S256)
     code_verifier = secrets.token_urlsafe(64)
+    # A SHA-256 digest is 32 bytes -> 43 base64 chars plus one "=" pad
     code_challenge = base64.urlsafe_b64encode(
-        hashlib.sha256(code_verifier.encode("utf-8")).digest()
-    ).rstrip(b"=").decode("ascii")
+        hashlib.sha256(code_verifier.encode("ascii")).digest()
+    )[:43].decode("ascii")
 
     # Short-lived signed state to protect against CSRF
     state_token = create_access_token(
@@ -393,23 +712,22 @@ async def faceit_login(request: Request):
         expires_delta=timedelta(minutes=10),
     )
 
-    params = {
-        "client_id": client_id,
-        "redirect_uri": redirect_uri,
-        "response_type": "code",
-        "scope": "openid email profile",
-        "state": state_token,
-        "code_challenge": code_challenge,
-        "code_challenge_method": "S256",
-    }
-
-    url = f"{FACEIT_AUTHORIZATION_URL}?{urlencode(params)}"
+    query = urlencode(
+        {
+            "client_id": client_id,
+            "redirect_uri": redirect_uri,
+            "state": state_token,
+            "code_challenge": code_challenge,
+        }
+    )
+    url = f"{FACEIT_AUTHORIZATION_URL}?{_FACEIT_AUTHORIZE_STATIC_QUERY}&{query}"
     return RedirectResponse(url)
 
 
-@router.get("/faceit/callback")
+@router.get("/faceit/callback", response_class=RedirectResponse)
 async def faceit_callback(
     request: Request,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     """Handle FACEIT OAuth2 callback, create/find user and issue JWT.
@@ -418,9 +736,8 @@ async def faceit_callback(
     to trigger automatic player analysis for the logged-in user.
     """
 
-    params = dict(request.query_params)
-    code = params.get("code")
-    state = params.get("state")
+    code = request.query_params.get("code")
+    state = request.query_params.get("state")
 
     if not code or not state:
         raise HTTPException(
@@ -446,46 +763,48 @@ async def faceit_callback(
             detail="Faceit OAuth is not configured",
         )
 
-    redirect_uri = f"{settings.WEBSITE_URL.rstrip('/')}/api/auth/faceit/callback"
+    redirect_uri = _FACEIT_REDIRECT_URI
 
     try:
-        timeout = aiohttp.ClientTimeout(total=5)
-        async with aiohttp.ClientSession(timeout=timeout) as http_session:
-            token_data = None
-            # Exchange code for tokens
-            async with http_session.post(
-                FACEIT_TOKEN_URL,
-                data={
-                    "grant_type": "authorization_code",
-                    "code": code,
-                    "redirect_uri": redirect_uri,
-                    "code_verifier": code_verifier,
-                },
-                headers={"Accept": "application/json"},
-                auth=aiohttp.BasicAuth(client_id, client_secret),
-            ) as token_resp:
-                if token_resp.status != 200:
-                    text = await token_resp.text()
-                    logger.error(
-                        "FACEIT token endpoint error %s: %s",
-                        token_resp.status,
-                        text,
-                    )
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Faceit authentication failed",
-                    )
-                token_data = await token_resp.json()
-
-            access_token_faceit = token_data.get("access_token")
-            if not access_token_faceit:
-                logger.error("FACEIT token response missing access_token: %s", token_data)
+        http_session = await get_http()
+        token_data = None
+        # Exchange code for tokens
+        async with http_session.post(
+            FACEIT_TOKEN_URL,
+            data={
+                "grant_type": "authorization_code",
+                "code": code,
+                "redirect_uri": redirect_uri,
+                "code_verifier": code_verifier,
+            },
+            headers={"Accept": "application/json"},
+            auth=aiohttp.BasicAuth(client_id, client_secret),
+        ) as token_resp:
+            if token_resp.status != 200:
+                text = await token_resp.text()
+                logger.error(
+                    "FACEIT token endpoint error %s: %s",
+                    token_resp.status,
+                    text,
+                )
                 raise HTTPException(
                     status_code=400,
                     detail="Faceit authentication failed",
                 )
+            token_data = await token_resp.json(loads=fast_json.loads)
 
-            # Fetch user info
+        access_token_faceit = token_data.get("access_token")
+        if not access_token_faceit:
+            logger.error("FACEIT token response missing access_token: %s", token_data)
+            raise HTTPException(
+                status_code=400,
+                detail="Faceit authentication failed",
+            )
+
+        # The id_token already carries the profile claims; fall back to the
+        # userinfo endpoint only when it is missing or incomplete
+        userinfo = _faceit_claims_from_id_token(token_data.get("id_token"), client_id)
+        if userinfo is None:
             async with http_session.get(
                 FACEIT_USERINFO_URL,
                 headers={
@@ -504,221 +823,103 @@ async def faceit_callback(
                         status_code=400,
                         detail="Faceit authentication failed",
                     )
-                userinfo = await userinfo_resp.json()
+                userinfo = await userinfo_resp.json(loads=fast_json.loads)
     except HTTPException:
         raise
     except Exception as e:  # pragma: no cover - network errors are logged
         logger.error("FACEIT OAuth callback error: %s", str(e))
         raise HTTPException(
-            status_code=400,
-            detail="Faceit authentication failed",
-        )
-
-    faceit_guid = (
-        userinfo.get("guid")
-        or userinfo.get("sub")
-        or userinfo.get("user_id")
-    )
-    if not faceit_guid:
-        logger.error("FACEIT userinfo missing guid/sub/user_id: %s", userinfo)
-        raise HTTPException(
-            status_code=400,
-            detail="Faceit authentication failed",
-        )
-
-    email = userinfo.get("email")
-    nickname = (
-        userinfo.get("nickname")
-        or userinfo.get("preferred_username")
-        or userinfo.get("name")
-        or f"faceit_{faceit_guid}"
-    )
-
-    # Try to find existing user by faceit_id
-    user = db.execute(
-        select(User).where(User.faceit_id == faceit_guid)
-    ).scalars().first()
-
-    if not user and email:
-        # Try to link to existing account with same email
-        user = db.execute(
-            select(User).where(User.email == email)
-        ).scalars().first()
-        if user and user.faceit_id and user.faceit_id != faceit_guid:
-            logger.warning(
-                "Email %s already linked to a different FACEIT id %s",
-                email,
-                user.faceit_id,
-            )
-            raise HTTPException(
-                status_code=400,
-                detail="This email is already linked to another Faceit account",
-            )
-
-    if not user:
-        # Create synthetic email if needed or if it's already taken
-        if email:
-            existing_email_user = db.execute(
-                select(User).where(User.email == email)
-            ).scalars().first()
-            if existing_email_user:
-                email = None
-
-        if not email:
-            email = f"faceit_{faceit_guid}@faceit.local"
-
-        # Ensure unique username
-        base_username = nickname
-        username = _make_unique_username(db, base_username)
-
-        random_password = secrets.token_urlsafe(16)
-        hashed_password = get_password_hash(random_password)
-
-        user = User(
-            email=email,
-            username=username,
-            hashed_password=hashed_password,
-            faceit_id=faceit_guid,
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-        subscription = Subscription(user_id=user.id, tier=SubscriptionTier.FREE)
-        db.add(subscription)
-        db.commit()
-    else:
-        updated = False
-
-        # Link FACEIT account if not already linked
-        if not user.faceit_id:
-            user_obj_faceit: Any = user
-            user_obj_faceit.faceit_id = faceit_guid
-            updated = True
-
-        if nickname and user.username:
-            legacy_pattern = rf"faceit_{re.escape(faceit_guid)}(?:_\d+)?$"
-            if re.fullmatch(legacy_pattern, user.username):
-                candidate = _make_unique_username(
-                    db,
-                    nickname,
-                    exclude_user_id=user.id,
-                )
-                if candidate != user.username:
-                    user_obj_username: Any = user
-                    user_obj_username.username = candidate
-                    updated = True
-
-        if updated:
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-
-    # Sync teammate search profile with Faceit data for this user
-    try:
-        from ..integrations.faceit_client import FaceitAPIClient
-
-        faceit_client = FaceitAPIClient()
-        faceit_player = await faceit_client.get_player_by_nickname(nickname)
-
-        elo = None
-        level = None
-        if isinstance(faceit_player, dict):
-            game_data = (faceit_player.get("games") or {}).get("cs2") or {}
-            elo = game_data.get("faceit_elo")
-            level = game_data.get("skill_level")
+            status_code=400,
+            detail="Faceit authentication failed",
+        )
 
-        profile = (
-            db.query(TeammateProfileDB)
-            .filter(TeammateProfileDB.user_id == user.id)
-            .first()
+    faceit_guid = (
+        userinfo.get("guid")
+        or userinfo.get("sub")
+        or userinfo.get("user_id")
+    )
+    if not faceit_guid:
+        logger.error("FACEIT userinfo missing guid/sub/user_id: %s", userinfo)
+        raise HTTPException(
+            status_code=400,
+            detail="Faceit authentication failed",
         )
-        if not profile:
-            profile = TeammateProfileDB(user_id=user.id)
-            db.add(profile)
 
-        profile_obj: Any = profile
-        profile_obj.faceit_nickname = nickname
-        if elo is not None:
-            profile_obj.elo = elo
-        if level is not None:
-            profile_obj.level = level
-        profile_obj.updated_at = datetime.utcnow()
+    email = userinfo.get("email")
+    nickname = (
+        userinfo.get("nickname")
+        or userinfo.get("preferred_username")
+        or userinfo.get("name")
+        or f"faceit_{faceit_guid}"
+    )
 
-        db.commit()
-    except Exception:
-        logger.exception("Failed to sync teammate profile from Faceit on login")
-        db.rollback()
+    user = await asyncio.to_thread(
+        _get_or_create_faceit_user, db, faceit_guid, email, nickname
+    )
 
-    try:
-        user_obj: Any = user
-        user_obj.last_login = datetime.utcnow()
-        user_obj.login_count = (user_obj.login_count or 0) + 1
-        db.add(user_obj)
-        db.commit()
-    except Exception as exc:
-        db.rollback()
-        logger.error(
-            "Failed to update login activity for user %s via FACEIT: %s",
-            user.id,
-            exc,
-        )
+    # Teammate profile sync needs a FACEIT API call; do it after the redirect
+    background_tasks.add_task(_sync_teammate_profile, user.id, nickname)
 
     access_token = create_access_token(data={"sub": str(user.id)})
-    refresh_token = create_refresh_token()
-    refresh_hash = hash_refresh_token(refresh_token)
-    now = datetime.utcnow()
-    session: UserSession | None = UserSession(
-        user_id=user.id,
-        token_hash=refresh_hash,
-        created_at=now,
-        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        user_agent=(request.headers.get("user-agent") or "")[:255],
-        ip_address=request.client.host if request.client else None,
-    )
-    try:
-        db.add(session)
-        db.commit()
-    except Exception as exc:
-        db.rollback()
-        logger.error(
-            "Failed to create refresh session for user %s during FACEIT callback: %s",
-            user.id,
-            exc,
-        )
-        session = None
+    refresh_token, session_row = _build_refresh_session(user.id, request)
+    stored = await _persist_refresh_session(db, session_row, "FACEIT callback")
 
-    secure_cookie = settings.WEBSITE_URL.startswith("https://") and (
-        request.url.hostname not in ("testserver", "localhost")
-    )
     redirect_url = (
-        f"{settings.WEBSITE_URL.rstrip('/')}/auth?faceit_token={access_token}&auto=1"
+        f"{_WEBSITE_BASE}/auth?faceit_token={access_token}&auto=1"
     )
     redirect_response = RedirectResponse(
         url=redirect_url,
         status_code=status.HTTP_302_FOUND,
     )
-    redirect_response.set_cookie(
-        key="access_token",
-        value=access_token,
-        httponly=True,
-        secure=secure_cookie,
-        samesite="none",
-        max_age=60 * 60 * 24 * 30,
+    _set_auth_cookies(
+        redirect_response,
+        request,
+        access_token,
+        refresh_token if stored else None,
     )
-    if session is not None:
-        redirect_response.set_cookie(
-            key="refresh_token",
-            value=refresh_token,
-            httponly=True,
-            secure=secure_cookie,
-            samesite="none",
-            max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
-        )
 
     return redirect_response
 
 
+def _email_registered(db: Session, email: str) -> bool:
+    """Uncached existence check so a stale login-cache miss can't let a duplicate through.
+
+    Sync Session work; called via ``asyncio.to_thread``.
+    """
+    return db.execute(select(User.id).where(User.email == email)).first() is not None
+
+
+def _create_registered_user(
+    db: Session,
+    email: str,
+    username: str,
+    hashed_password: str,
+    faceit_id: str | None,
+) -> User:
+    """Create a password user with a FREE subscription and record the login.
+
+    Sync Session work; called via ``asyncio.to_thread``.
+    """
+    new_user = User(
+        email=email,
+        username=username,
+        hashed_password=hashed_password,
+        faceit_id=faceit_id,
+    )
+
+    new_user_obj: Any = new_user
+    new_user_obj.last_login = utcnow()
+    new_user_obj.login_count = 1
+
+    db.add(new_user)
+    # Flush to get new_user.id; commit user and subscription together
+    db.flush()
+    db.add(Subscription(user_id=new_user.id, tier=SubscriptionTier.FREE))
+    db.commit()
+    db.refresh(new_user)
+    return new_user
+
+
 @router.post("/register", response_model=Token)
 async def register(
     request: Request,
@@ -755,7 +956,7 @@ async def register(
             faceit_id = faceit_id_value if isinstance(faceit_id_value, str) else None
             captcha_token = captcha_value if isinstance(captcha_value, str) else None
         else:
-            body = await request.json()
+            body = fast_json.loads(await request.body())
             email_value = body.get("email")
             username_value = body.get("username")
             password_value = body.get("password")
@@ -801,97 +1002,38 @@ async def register(
                 detail=password_error,
             )
 
-        if not any(c.isalpha() for c in password) or not any(c.isdigit() for c in password):
+        if not _has_letter_and_digit(password):
             raise HTTPException(
                 status_code=400,
                 detail=password_error,
             )
 
-        existing = db.execute(
-            select(User).where(User.email == email)
-        ).scalars().first()
-        if existing:
+        if await asyncio.to_thread(_email_registered, db, email):
             raise HTTPException(status_code=400, detail="Email already registered")
 
-        hashed_password = get_password_hash(password)
-
-        new_user = User(
-            email=email,
-            username=username,
-            hashed_password=hashed_password,
-            faceit_id=faceit_id,
-        )
-
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        # bcrypt is deliberately slow; keep it off the event loop
+        hashed_password = await get_password_hash_async(password)
 
-        subscription = Subscription(
-            user_id=new_user.id, tier=SubscriptionTier.FREE
+        new_user = await asyncio.to_thread(
+            _create_registered_user,
+            db,
+            email,
+            username,
+            hashed_password,
+            faceit_id,
         )
-        db.add(subscription)
-        db.commit()
-
-        try:
-            new_user_obj: Any = new_user
-            new_user_obj.last_login = datetime.utcnow()
-            new_user_obj.login_count = (new_user_obj.login_count or 0) + 1
-            db.add(new_user_obj)
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            logger.error(
-                "Failed to update login activity for newly registered user %s: %s",
-                new_user.id,
-                exc,
-            )
 
         access_token = create_access_token(data={"sub": str(new_user.id)})
-        refresh_token = create_refresh_token()
-        refresh_hash = hash_refresh_token(refresh_token)
-        now = datetime.utcnow()
-        session: UserSession | None = UserSession(
-            user_id=new_user.id,
-            token_hash=refresh_hash,
-            created_at=now,
-            expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-            user_agent=(request.headers.get("user-agent") or "")[:255],
-            ip_address=remote_ip,
-        )
-        try:
-            db.add(session)
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            logger.error(
-                "Failed to create refresh session for newly registered user %s: %s",
-                new_user.id,
-                exc,
-            )
-            session = None
-
-        secure_cookie = settings.WEBSITE_URL.startswith("https://") and (
-            request.url.hostname not in ("testserver", "localhost")
-        )
-        response.set_cookie(
-            key="access_token",
-            value=access_token,
-            httponly=True,
-            secure=secure_cookie,
-            samesite="none",
-            max_age=60 * 60 * 24 * 30,
+        refresh_token, session_row = _build_refresh_session(new_user.id, request)
+        stored = await _persist_refresh_session(db, session_row, "registration")
+
+        _set_auth_cookies(
+            response,
+            request,
+            access_token,
+            refresh_token if stored else None,
         )
 
-        if session is not None:
-            response.set_cookie(
-                key="refresh_token",
-                value=refresh_token,
-                httponly=True,
-                secure=secure_cookie,
-                samesite="none",
-                max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
-            )
-
         try:
             ACTIVE_USERS.inc()
         except Exception:
@@ -910,49 +1052,42 @@ async def register(
         )
 
 
+def _extract_creds(data: Any) -> tuple[str | None, str | None, str | None]:
+    """Return (email, password, captcha_token) from a parsed login body.
+
+    Accepts form data or a JSON object; ``username`` is an alias for
+    ``email``. Missing or non-string values come back as None.
+    """
+    if not isinstance(data, Mapping):
+        return None, None, None
+    values = (
+        data.get("email") or data.get("username"),
+        data.get("password"),
+        data.get("captcha_token"),
+    )
+    email, password, captcha_token = (v if isinstance(v, str) else None for v in values)
+    return email, password, captcha_token
+
+
 @router.post("/login", response_model=Token)
 async def login(
     request: Request,
     response: Response,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _: None = Depends(rate_limiter),
 ):
     """Login user"""
-    # Try to get form data first
-    email: str | None = None
-    password: str | None = None
-    captcha_token: str | None = None
-    try:
-        form = await request.form()
-        if form:
-            # Support both email and username
-            email_value = form.get("email") or form.get("username")
-            password_value = form.get("password")
-            captcha_value = form.get("captcha_token")
-
-            email = email_value if isinstance(email_value, str) else None
-            password = password_value if isinstance(password_value, str) else None
-            captcha_token = captcha_value if isinstance(captcha_value, str) else None
-        else:
-            body = await request.json()
-            # Support both email and username
-            email_value = body.get("email") or body.get("username")
-            password_value = body.get("password")
-            captcha_raw = body.get("captcha_token")
-
-            email = email_value if isinstance(email_value, str) else None
-            password = password_value if isinstance(password_value, str) else None
-            captcha_token = captcha_raw if isinstance(captcha_raw, str) else None
-    except Exception:
-        body = await request.json()
-        # Support both email and username
-        email_value = body.get("email") or body.get("username")
-        password_value = body.get("password")
-        captcha_raw = body.get("captcha_token")
-
-        email = email_value if isinstance(email_value, str) else None
-        password = password_value if isinstance(password_value, str) else None
-        captcha_token = captcha_raw if isinstance(captcha_raw, str) else None
+    # Branch on the declared body type instead of trying form() and falling back
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(("application/x-www-form-urlencoded", "multipart/form-data")):
+        data: Any = await request.form()
+    else:
+        try:
+            data = fast_json.loads(await request.body())
+        except ValueError:
+            data = None
+    email, password, captcha_token = _extract_creds(data)
 
     if email is None or password is None:
         raise HTTPException(
@@ -961,57 +1096,38 @@ async def login(
         )
 
     origin = request.headers.get("origin") or ""
-    skip_captcha_for_extension = origin.startswith("chrome-extension://")
+    skip_captcha_for_extension = origin.startswith(_CAPTCHA_EXEMPT_ORIGIN_PREFIXES)
 
     remote_ip = request.client.host if request.client else None
-    if not skip_captcha_for_extension:
+    if skip_captcha_for_extension:
+        user = await asyncio.to_thread(load_user_by_email, db, email)
+    else:
         if captcha_service.is_enabled() and not captcha_token:
             raise HTTPException(
                 status_code=400,
                 detail="Missing captcha_token",
             )
-        captcha_ok = await captcha_service.verify_token(
-            token=captcha_token,
-            remote_ip=remote_ip,
-            action="auth_login",
-            fail_open_on_error=True,
-        )
+        # The user lookup doesn't depend on the captcha; run it meanwhile
+        user_lookup = asyncio.create_task(asyncio.to_thread(load_user_by_email, db, email))
+        try:
+            captcha_ok = await captcha_service.verify_token(
+                token=captcha_token,
+                remote_ip=remote_ip,
+                action="auth_login",
+                fail_open_on_error=True,
+            )
+        finally:
+            # Always wait, so the request's DB session is idle once we return
+            user = await user_lookup
         if not captcha_ok:
             raise HTTPException(
                 status_code=400,
                 detail="CAPTCHA verification failed",
             )
 
-    user = db.execute(
-        select(User).where(User.email == email)
-    ).scalars().first()
-
-    if user is None:
-        try:
-            if rate_limiter.redis_client is not None:
-                client_ip = rate_limiter._get_client_ip(request)
-                await rate_limiter._register_violation_and_maybe_ban(
-                    client_ip,
-                    None,
-                )
-        except Exception:
-            logger.exception("Failed to register login rate limit violation")
-
-        try:
-            AUTH_FAILED.labels(
-                ip=remote_ip or "unknown",
-                reason="bad_credentials",
-            ).inc()
-        except Exception:
-            pass
-
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-        )
-
-    hashed_password = cast(str, user.hashed_password)
-    if not verify_password(password, hashed_password):
+    # Unknown emails fail here too; see AUTH_DUMMY_PASSWORD_CHECK
+    hashed_password = cast(str, user.hashed_password) if user is not None else None
+    if not await verify_password_async(password, hashed_password) or user is None:
         try:
             if rate_limiter.redis_client is not None:
                 client_ip = rate_limiter._get_client_ip(request)
@@ -1048,82 +1164,158 @@ async def login(
             status_code=400, detail="User account is inactive"
         )
 
-    try:
-        user_obj2: Any = user
-        user_obj2.last_login = datetime.utcnow()
-        user_obj2.login_count = (user_obj2.login_count or 0) + 1
-        db.add(user_obj2)
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to update login activity for user {user.id}: {str(e)}")
-
     try:
         ACTIVE_USERS.inc()
     except Exception:
         pass
 
+    # last_login/login_count are not needed for the response
+    background_tasks.add_task(_record_login, user.id, user.email)
+
     access_token = create_access_token(data={"sub": str(user.id)})
 
     # Create refresh token session
-    refresh_token = create_refresh_token()
-    refresh_hash = hash_refresh_token(refresh_token)
-    now = datetime.utcnow()
-    session: UserSession | None = UserSession(
-        user_id=user.id,
-        token_hash=refresh_hash,
-        created_at=now,
-        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        user_agent=(request.headers.get("user-agent") or "")[:255],
-        ip_address=remote_ip,
-    )
-    try:
-        db.add(session)
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        logger.error(
-            "Failed to create refresh session for user %s during login: %s",
-            user.id,
-            str(e),
-        )
-        session = None
+    refresh_token, session_row = _build_refresh_session(user.id, request)
+    stored = await _persist_refresh_session(db, session_row, "login")
 
     # Set httpOnly cookie for 30 days in addition to returning the token in JSON
-    secure_cookie = settings.WEBSITE_URL.startswith("https://") and (
-        request.url.hostname not in ("testserver", "localhost")
-    )
-    response.set_cookie(
-        key="access_token",
-        value=access_token,
-        httponly=True,
-        secure=secure_cookie,
-        samesite="none",
-        max_age=60 * 60 * 24 * 30,
+    _set_auth_cookies(
+        response,
+        request,
+        access_token,
+        refresh_token if stored else None,
     )
 
-    if session is not None:
-        response.set_cookie(
-            key="refresh_token",
-            value=refresh_token,
-            httponly=True,
-            secure=secure_cookie,
-            samesite="none",
-            max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
-        )
-
     logger.info(f"User logged in: {user.email}")
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_active_user),
+    current_user: dict[str, Any] = Depends(get_current_active_user_values),
 ):
     """Get current user info"""
     return current_user
 
 
+def _revoke_refresh_session(db: Session, token_hash: str) -> None:
+    try:
+        db.execute(
+            update(UserSession)
+            .where(UserSession.token_hash == token_hash)
+            .where(UserSession.revoked_at.is_(None))
+            .values(revoked_at=utcnow())
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to revoke refresh token: {str(e)}")
+
+
+def _swap_refresh_session(
+    db: Session,
+    token_hash: str,
+    row: dict[str, Any],
+    now: datetime,
+) -> bool:
+    """Revoke the valid session ``token_hash`` and insert the new ``row``.
+
+    Returns False (writing nothing) if the old session is no longer valid.
+    On PostgreSQL both writes go out as one statement: an UPDATE ... RETURNING
+    CTE feeding an INSERT ... SELECT, so the new row exists only if the old
+    one was revoked. Other backends run the same guarded UPDATE and INSERT.
+    """
+    revoke = (
+        update(UserSession)
+        .where(UserSession.token_hash == token_hash)
+        .where(UserSession.revoked_at.is_(None))
+        .where(UserSession.expires_at > now)
+        .values(revoked_at=now)
+    )
+
+    if db.get_bind().dialect.name != "postgresql":
+        if db.execute(revoke).rowcount != 1:
+            return False
+        db.execute(insert(UserSession).values(row))
+        return True
+
+    revoked = revoke.returning(UserSession.user_id).cte("revoked")
+    # user_id comes from the revoked row
+    columns = {
+        name: literal(value, UserSession.__table__.c[name].type)
+        for name, value in row.items()
+        if name != "user_id"
+    }
+    rotate = (
+        insert(UserSession)
+        .from_select(
+            ["user_id", *columns],
+            select(revoked.c.user_id, *columns.values()),
+        )
+        .add_cte(revoked)
+    )
+    return db.execute(rotate).rowcount == 1
+
+
+def _rotate_refresh_session(
+    db: Session,
+    request: Request,
+    token_hash: str,
+    user_id: int | None,
+) -> tuple[str | None, str | None, dict[str, Any] | None]:
+    """Revoke the session behind ``token_hash`` and store a new one.
+
+    ``user_id`` comes from the Redis index when available, which skips the
+    UserSession lookup. Returns ``(error_detail, new_refresh_token, row)``
+    where row holds the stored session values and error_detail is set when
+    the caller must answer 401.
+    """
+    now = utcnow()
+
+    if user_id is None:
+        # Session validity and its user in one round-trip
+        user = (
+            db.execute(
+                select(User)
+                .join(UserSession, UserSession.user_id == User.id)
+                .where(UserSession.token_hash == token_hash)
+                .where(UserSession.revoked_at.is_(None))
+                .where(UserSession.expires_at > now)
+            )
+            .scalars()
+            .first()
+        )
+        if not user:
+            return "Invalid or expired refresh token", None, None
+        user_id = cast(int, user.id)
+    else:
+        user = load_user(db, user_id)
+
+    if not user or not user.is_active:
+        # User is missing or inactive: revoke the session as well
+        _revoke_refresh_session(db, token_hash)
+        return "User not found or inactive", None, None
+
+    # Rotate refresh token: revoke the old session and create a new one. The
+    # WHERE clause re-checks validity, so an index entry that outlived a
+    # revocation (or a concurrent rotation) can't be used twice.
+    new_refresh, session_row = _build_refresh_session(user_id, request, now)
+    try:
+        if not _swap_refresh_session(db, token_hash, session_row, now):
+            # Nothing was written; the session is no longer valid
+            return "Invalid or expired refresh token", None, None
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error("Failed to rotate refresh token for user %s: %s", user_id, str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not refresh token",
+        )
+
+    return None, new_refresh, session_row
+
+
 @router.post("/logout")
 async def logout_user(request: Request, response: Response, db: Session = Depends(get_db)):
     """Logout user by clearing auth cookies and revoking refresh session if present"""
@@ -1131,29 +1323,25 @@ async def logout_user(request: Request, response: Response, db: Session = Depend
     refresh_cookie = request.cookies.get("refresh_token")
     if refresh_cookie:
         token_hash = hash_refresh_token(refresh_cookie)
-        try:
-            session = (
-                db.execute(
-                    select(UserSession).where(UserSession.token_hash == token_hash)
-                )
-                .scalars()
-                .first()
-            )
-            if session and session.revoked_at is None:
-                session_obj_logout: Any = session
-                session_obj_logout.revoked_at = datetime.utcnow()
-                db.add(session_obj_logout)
-                db.commit()
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Failed to revoke refresh token on logout: {str(e)}")
+        await asyncio.to_thread(_revoke_refresh_session, db, token_hash)
+        await session_store.forget(token_hash)
 
     response.delete_cookie(key="access_token")
     response.delete_cookie(key="refresh_token")
     return {"detail": "Logged out"}
 
 
-@router.post("/refresh")
+def _refresh_unauthorized(detail: str | None) -> JSONResponse:
+    """401 answer for /refresh that also clears the refresh cookie."""
+    response = JSONResponse(
+        {"detail": detail},
+        status_code=status.HTTP_401_UNAUTHORIZED,
+    )
+    response.delete_cookie(key="refresh_token")
+    return response
+
+
+@router.post("/refresh", response_model=Token)
 async def refresh_access_token(
     request: Request,
     response: Response,
@@ -1164,104 +1352,31 @@ async def refresh_access_token(
     raw_refresh = request.cookies.get("refresh_token")
     if not raw_refresh:
         # Clear any stale refresh cookie and return 401
-        response.delete_cookie(key="refresh_token")
-        response.status_code = status.HTTP_401_UNAUTHORIZED
-        return {"detail": "Not authenticated"}
+        return _refresh_unauthorized("Not authenticated")
 
     token_hash = hash_refresh_token(raw_refresh)
-    now = datetime.utcnow()
-
-    session = (
-        db.execute(
-            select(UserSession)
-            .where(UserSession.token_hash == token_hash)
-            .where(UserSession.revoked_at.is_(None))
-            .where(UserSession.expires_at > now)
-        )
-        .scalars()
-        .first()
-    )
-
-    if not session:
-        # Invalid or expired refresh token: clear cookie and return 401
-        response.delete_cookie(key="refresh_token")
-        response.status_code = status.HTTP_401_UNAUTHORIZED
-        return {"detail": "Invalid or expired refresh token"}
-
-    user = db.execute(select(User).where(User.id == session.user_id)).scalars().first()
-    if not user or not user.is_active:
-        session_obj_inactive: Any = session
-        session_obj_inactive.revoked_at = now
-        try:
-            db.add(session_obj_inactive)
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            logger.error(
-                "Failed to revoke session for missing/inactive user %s: %s",
-                session.user_id,
-                str(e),
-            )
-        # User is missing or inactive: revoke session, clear cookie and return 401
-        response.delete_cookie(key="refresh_token")
-        response.status_code = status.HTTP_401_UNAUTHORIZED
-        return {"detail": "User not found or inactive"}
-
-    # Rotate refresh token: revoke old session and create a new one
-    new_refresh = create_refresh_token()
-    new_hash = hash_refresh_token(new_refresh)
-    new_expires = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-
-    session_obj_rotate: Any = session
-    session_obj_rotate.revoked_at = now
-    new_session = UserSession(
-        user_id=user.id,
-        token_hash=new_hash,
-        created_at=now,
-        expires_at=new_expires,
-        user_agent=(request.headers.get("user-agent") or "")[:255],
-        ip_address=request.client.host if request.client else None,
+    indexed_user_id = await session_store.lookup(token_hash)
+    error_detail, new_refresh, session_row = await asyncio.to_thread(
+        _rotate_refresh_session, db, request, token_hash, indexed_user_id
     )
+    await session_store.forget(token_hash)
 
-    try:
-        db.add(session)
-        db.add(new_session)
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        logger.error("Failed to rotate refresh token for user %s: %s", user.id, str(e))
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Could not refresh token",
-        )
+    if error_detail is not None or new_refresh is None or session_row is None:
+        # Invalid/expired token or inactive user: clear cookie and return 401
+        return _refresh_unauthorized(error_detail)
 
-    access_token = create_access_token(data={"sub": str(user.id)})
+    # Index the stored row as-is; the new token is not hashed a second time
+    user_id = session_row["user_id"]
+    await session_store.remember(session_row["token_hash"], user_id, session_row["expires_at"])
+    access_token = create_access_token(data={"sub": str(user_id)})
 
-    secure_cookie = settings.WEBSITE_URL.startswith("https://") and (
-        request.url.hostname not in ("testserver", "localhost")
-    )
-    response.set_cookie(
-        key="access_token",
-        value=access_token,
-        httponly=True,
-        secure=secure_cookie,
-        samesite="none",
-        max_age=60 * 60 * 24 * 30,
-    )
-    response.set_cookie(
-        key="refresh_token",
-        value=new_refresh,
-        httponly=True,
-        secure=secure_cookie,
-        samesite="none",
-        max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
-    )
+    _set_auth_cookies(response, request, access_token, new_refresh)
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/steam/link", response_model=UserResponse)
-async def link_steam_account(
+def link_steam_account(
     payload: SteamLinkRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
@@ -1293,7 +1408,7 @@ async def link_steam_account(
 
 
 @router.post("/steam/unlink", response_model=UserResponse)
-async def unlink_steam_account(
+def unlink_steam_account(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
@@ -1,5 +1,9 @@
 """JWT and password security"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import os
 from typing import Any, Dict, Optional, cast
 
 import bcrypt
@@ -7,12 +11,32 @@ import jwt
 from jwt.exceptions import InvalidTokenError
 import secrets
 import hashlib
+import time
 
 from ..config.settings import settings
+from ..core.memory_cache import TTLCache
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 
+# Verified token payloads keyed by the raw token. Tokens are immutable, so a
+# hit skips signature verification on repeat requests; entries never outlive
+# the token's own exp.
+_TOKEN_CACHE_TTL = 60.0
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=_TOKEN_CACHE_TTL)
+
+# Stored for accounts created through OAuth (Steam/FACEIT) that have no
+# password. It is not a valid bcrypt hash, so it never matches any input.
+UNUSABLE_PASSWORD_HASH = "!"
+
+# bcrypt releases the GIL, so hashes run in parallel on threads. A dedicated
+# pool sized to the CPU count keeps logins from queueing behind (or starving)
+# the default executor used for DB work.
+_password_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="password",
+)
+
 
 def _normalize_password(password: str) -> bytes:
     """Encode password to bytes and truncate to 72 bytes for bcrypt compatibility."""
@@ -24,6 +48,8 @@ def _normalize_password(password: str) -> bytes:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against bcrypt hash."""
+    if not hashed_password or hashed_password.startswith(UNUSABLE_PASSWORD_HASH):
+        return False
     password_bytes = _normalize_password(plain_password)
     try:
         return bcrypt.checkpw(password_bytes, hashed_password.encode("utf-8"))
@@ -39,6 +65,49 @@ def get_password_hash(password: str) -> str:
     return hashed.decode("utf-8")
 
 
+@lru_cache(maxsize=1)
+def _dummy_password_hash() -> str:
+    return get_password_hash(secrets.token_urlsafe(16))
+
+
+if settings.AUTH_DUMMY_PASSWORD_CHECK:
+    # Hash once at startup rather than on the first unknown-email login
+    _dummy_password_hash()
+
+
+def _verify_password_or_dummy(plain_password: str, hashed_password: Optional[str]) -> bool:
+    if hashed_password is None:
+        # Unknown account: spend the same bcrypt time, then fail
+        verify_password(plain_password, _dummy_password_hash())
+        return False
+    return verify_password(plain_password, hashed_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """Verify a password on the password pool without blocking the event loop.
+
+    With no ``hashed_password`` (unknown account) this fails immediately,
+    unless AUTH_DUMMY_PASSWORD_CHECK is set: then a full bcrypt check runs
+    against a dummy hash, so response time doesn't reveal whether the
+    account exists.
+    """
+    if hashed_password is None and not settings.AUTH_DUMMY_PASSWORD_CHECK:
+        return False
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor,
+        _verify_password_or_dummy,
+        plain_password,
+        hashed_password,
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
 def create_access_token(
     data: dict,
     expires_delta: Optional[timedelta] = None,
@@ -64,12 +133,25 @@ def create_access_token(
 
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
     """Decode and verify JWT token"""
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return dict(cached)
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return cast(Dict[str, Any], payload)
+        payload = cast(
+            Dict[str, Any], jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        )
     except InvalidTokenError:
         return None
 
+    ttl = _TOKEN_CACHE_TTL
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _token_cache.set(token, dict(payload), ttl=ttl)
+    return payload
+
 
 def create_refresh_token() -> str:
     """Generate a strong random refresh token string."""
@@ -0,0 +1,67 @@
+"""Redis index of active refresh sessions
+
+Maps a refresh token hash to its user id, with a TTL equal to the session's
+remaining lifetime, so the refresh endpoint can skip the UserSession lookup.
+Postgres stays the source of truth: entries are written after the row is
+committed and deleted on rotation, logout and revocation; every miss or
+Redis error falls back to the DB.
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+from ..core.timeutil import utcnow
+from ..services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "auth:rs:"
+
+
+def _client():
+    if not getattr(cache_service, "enabled", False):
+        return None
+    return cache_service.redis_client
+
+
+async def remember(token_hash: str, user_id: int, expires_at: datetime) -> None:
+    """Index a committed refresh session until it expires."""
+    client = _client()
+    if client is None:
+        return
+    # Session timestamps are naive UTC
+    ttl = int((expires_at - utcnow()).total_seconds())
+    if ttl <= 0:
+        return
+    try:
+        await client.set(f"{_KEY_PREFIX}{token_hash}", str(user_id), ex=ttl)
+    except Exception:
+        logger.debug("Failed to index refresh session", exc_info=True)
+
+
+async def lookup(token_hash: str) -> Optional[int]:
+    """Return the user id of an indexed session, or None if unknown."""
+    client = _client()
+    if client is None:
+        return None
+    try:
+        value = await client.get(f"{_KEY_PREFIX}{token_hash}")
+    except Exception:
+        logger.debug("Failed to read refresh session index", exc_info=True)
+        return None
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+async def forget(token_hash: str) -> None:
+    """Drop a session from the index (rotation, logout, revocation)."""
+    client = _client()
+    if client is None:
+        return
+    try:
+        await client.delete(f"{_KEY_PREFIX}{token_hash}")
+    except Exception:
+        logger.debug("Failed to drop refresh session index", exc_info=True)
@@ -9,6 +9,11 @@ celery_app.conf.beat_schedule = {
         "schedule": crontab(hour=3, minute=0),  # 3:00 AM daily
         "args": (30,),  # Delete data older than 30 days
     },
+    "cleanup-expired-sessions-daily": {
+        "task": "src.server.tasks.cleanup_expired_sessions_task",
+        "schedule": crontab(hour=3, minute=30),  # 3:30 AM daily
+        "args": (7,),  # Keep a week of expired sessions
+    },
     "check-subscription-expiry": {
         "task": "src.server.tasks.check_subscription_expiry_task",
         "schedule": crontab(hour=9, minute=0),  # 9:00 AM daily
@@ -35,6 +35,9 @@ class Settings(BaseSettings):
     # AI Services
     GROQ_API_KEY: Optional[str] = None
     GROQ_MODEL: Optional[str] = None
+    # Faster Groq model for short structured replies (training plans);
+    # set empty to use GROQ_MODEL for every task
+    GROQ_FAST_MODEL: Optional[str] = "llama-3.1-8b-instant"
     OPENROUTER_API_KEY: Optional[str] = None
     OPENROUTER_MODEL: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
@@ -48,11 +51,35 @@ class Settings(BaseSettings):
     LOCAL_LLM_MODEL: Optional[str] = None
     LOCAL_LLM_API_KEY: Optional[str] = None
 
+    # Total timeout (seconds) for a single LLM provider request
+    GROQ_TIMEOUT: float = 60.0
+    # Upper bound (seconds) for a single attempt including the response body
+    GROQ_REQUEST_TIMEOUT: float = 30.0
+
+    # In-process cache lifetime (seconds) for analyses/plans, 0 disables it
+    GROQ_CACHE_TTL: int = 3600
+
+    # Retries for transient LLM provider failures (429/5xx, timeouts)
+    GROQ_RETRY_ATTEMPTS: int = 4
+    GROQ_RETRY_BASE_DELAY: float = 0.4
+    # Client-side provider limits per model (0 disables the limiter)
+    GROQ_RPM: int = 0
+    GROQ_TPM: int = 0
+    # Stop calling the provider for GROQ_BREAKER_RESET_TIMEOUT seconds after
+    # this many consecutive failed requests (0 disables the breaker)
+    GROQ_BREAKER_FAIL_MAX: int = 10
+    GROQ_BREAKER_RESET_TIMEOUT: float = 30.0
+
     # Security settings
     SECRET_KEY: str = "change-me-in-production-min-32-characters-long"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Run a dummy bcrypt check for logins with an unknown email, so timing
+    # doesn't reveal which accounts exist. Off by default: registration
+    # already answers "Email already registered", and the check costs a
+    # full bcrypt round per miss.
+    AUTH_DUMMY_PASSWORD_CHECK: bool = False
 
     # CAPTCHA settings (e.g. Cloudflare Turnstile)
     CAPTCHA_PROVIDER: Optional[str] = None
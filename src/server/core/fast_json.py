@@ -0,0 +1,52 @@
+"""JSON encoding helpers with an optional orjson fast path.
+
+orjson is not a hard dependency of the service. When it is installed the
+helpers below use it; otherwise they quietly fall back to the stdlib ``json``
+module with equivalent output (UTF-8, compact separators).
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:  # orjson is not installed in the environment
+    orjson = None  # type: ignore[assignment]
+    ORJSON_AVAILABLE = False
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Parse a JSON document from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize ``obj`` to compact UTF-8 JSON bytes.
+
+    Values that are not natively serializable (datetimes, enums, ...) are
+    converted with ``str`` so logging and persistence never fail on them.
+    ``sort_keys`` gives a canonical encoding, e.g. for hashing.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=str, option=option)
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+        sort_keys=sort_keys,
+    ).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize ``obj`` to a compact JSON string (see dumps_bytes)."""
+    if orjson is not None:
+        return dumps_bytes(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
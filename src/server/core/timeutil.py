@@ -0,0 +1,8 @@
+"""Time helpers shared by the API and background tasks."""
+
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    """Naive UTC now, as stored in the DB (datetime.utcnow is deprecated)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -4,7 +4,7 @@ from typing import Any
 
 from sqlalchemy import (
     Column, Integer, String, Float, Boolean, DateTime,
-    ForeignKey, Enum,
+    ForeignKey, Enum, Index, text,
 )
 from sqlalchemy.orm import relationship, declarative_base
 import enum
@@ -56,6 +56,16 @@ class User(Base):
         "TeammateProfile", back_populates="user", uselist=False
     )
 
+    __table_args__ = (
+        # Serves the "<base>_%" LIKE prefix match in _make_unique_username under
+        # non-C collations (migration 008)
+        Index(
+            "ix_users_username_pattern",
+            "username",
+            postgresql_ops={"username": "text_pattern_ops"},
+        ),
+    )
+
 
 class UserSession(Base):
     __tablename__ = "user_sessions"
@@ -71,6 +81,17 @@ class UserSession(Base):
 
     user = relationship("User", backref="sessions")
 
+    __table_args__ = (
+        # Refresh lookups only match unrevoked sessions (migration 007)
+        Index(
+            "ix_user_sessions_active_hash",
+            "token_hash",
+            postgresql_include=["user_id", "expires_at"],
+            postgresql_where=text("revoked_at IS NULL"),
+            sqlite_where=text("revoked_at IS NULL"),
+        ),
+    )
+
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
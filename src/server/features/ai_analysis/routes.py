@@ -1,12 +1,16 @@
 """AI Analysis API Routes"""
+import asyncio
 import logging
-from typing import Dict, List, Optional, cast
+from typing import AsyncIterator, Dict, List, Optional, Tuple, cast
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from ...ai.groq_service import get_groq_service
 from ...auth.dependencies import get_optional_current_user
+from ...core import fast_json
 from ...database.connection import get_db
 from ...database.models import User
 from ...integrations.faceit_client import FaceitAPIClient
@@ -49,6 +53,59 @@ async def enforce_ai_player_analysis_rate_limit(
     )
 
 
+async def _load_player_context(
+    faceit_client: FaceitAPIClient,
+    request: PlayerAnalysisRequest,
+) -> Tuple[str, Dict, List[Dict]]:
+    """Fetch (player_id, stats for the prompt, match history) from Faceit."""
+    # Fetch player data
+    player_data = None
+    player_id: str
+    if request.faceit_id:
+        player_id = request.faceit_id
+    else:
+        player_data = await faceit_client.get_player_by_nickname(
+            request.player_nickname
+        )
+        if player_data:
+            raw_player_id = player_data.get("player_id")
+            if not isinstance(raw_player_id, str):
+                raise HTTPException(
+                    status_code=500,
+                    detail="Invalid player_id format from Faceit API",
+                )
+            player_id = raw_player_id
+        else:
+            raise HTTPException(
+                status_code=404, detail="Player not found"
+            )
+
+    # Stats and match history are independent Faceit calls
+    stats, match_history = await asyncio.gather(
+        faceit_client.get_player_stats(player_id),
+        faceit_client.get_match_history(player_id, limit=20),
+    )
+
+    if not stats:
+        raise HTTPException(
+            status_code=404, detail="Stats not available"
+        )
+
+    # Prepare statistics for analysis
+    lifetime_stats = stats.get('lifetime', {})
+    player_stats = {
+        'kd_ratio': float(lifetime_stats.get('K/D Ratio', '1.0')),
+        'win_rate': float(lifetime_stats.get('Win Rate %', '50')),
+        'hs_percentage': float(lifetime_stats.get('Headshots %', '40')),
+        'matches_played': int(lifetime_stats.get('Matches', '0')),
+        'avg_damage': float(
+            lifetime_stats.get('Average K/D Ratio', '1.0')
+        )
+    }
+
+    return player_id, player_stats, match_history
+
+
 @router.post("/analyze-player", response_model=PlayerAnalysisResponse)
 async def analyze_player(
     request: PlayerAnalysisRequest,
@@ -66,50 +123,8 @@ async def analyze_player(
         ai_service = AIService()
         faceit_client = FaceitAPIClient()
 
-        # Fetch player data
-        player_data = None
-        player_id: str
-        if request.faceit_id:
-            player_id = request.faceit_id
-            stats = await faceit_client.get_player_stats(player_id)
-        else:
-            player_data = await faceit_client.get_player_by_nickname(
-                request.player_nickname
-            )
-            if player_data:
-                raw_player_id = player_data.get("player_id")
-                if not isinstance(raw_player_id, str):
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Invalid player_id format from Faceit API",
-                    )
-                player_id = raw_player_id
-                stats = await faceit_client.get_player_stats(player_id)
-            else:
-                raise HTTPException(
-                    status_code=404, detail="Player not found"
-                )
-
-        if not stats:
-            raise HTTPException(
-                status_code=404, detail="Stats not available"
-            )
-
-        # Prepare statistics for analysis
-        lifetime_stats = stats.get('lifetime', {})
-        player_stats = {
-            'kd_ratio': float(lifetime_stats.get('K/D Ratio', '1.0')),
-            'win_rate': float(lifetime_stats.get('Win Rate %', '50')),
-            'hs_percentage': float(lifetime_stats.get('Headshots %', '40')),
-            'matches_played': int(lifetime_stats.get('Matches', '0')),
-            'avg_damage': float(
-                lifetime_stats.get('Average K/D Ratio', '1.0')
-            )
-        }
-
-        # Fetch match history
-        match_history = await faceit_client.get_match_history(
-            player_id, limit=20
+        player_id, player_stats, match_history = await _load_player_context(
+            faceit_client, request
         )
 
         # Analysis
@@ -157,6 +172,54 @@ async def analyze_player(
         )
 
 
+@router.post("/analyze-player/stream")
+async def analyze_player_stream(
+    request: PlayerAnalysisRequest,
+    language: str = "ru",
+    _: None = Depends(rate_limiter),
+    __: None = Depends(enforce_ai_player_analysis_rate_limit),
+):
+    """
+    Stream the AI analysis text as server-sent events
+
+    Each event carries a ``{"delta": ...}`` chunk as soon as the model
+    produces it; the stream ends with ``data: [DONE]``. A failure after
+    the response has started is sent as an ``{"error": ...}`` event.
+    """
+    try:
+        _, player_stats, match_history = await _load_player_context(
+            FaceitAPIClient(), request
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error analyzing player: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to analyze player"
+        )
+
+    async def events() -> AsyncIterator[bytes]:
+        chunks = get_groq_service().stream_player_performance(
+            player_stats, match_history, language
+        )
+        try:
+            async for delta in chunks:
+                yield b"data: " + fast_json.dumps_bytes({"delta": delta}) + b"\n\n"
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            logger.error("Error streaming player analysis: %s", e)
+            error = {"error": "Failed to analyze player"}
+            yield b"data: " + fast_json.dumps_bytes(error) + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/training-plan/{player_id}")
 async def get_training_plan(
     player_id: str,
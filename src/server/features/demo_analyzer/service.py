@@ -37,11 +37,11 @@ logger = logging.getLogger(__name__)
 class DemoAnalyzer:
     def __init__(self):
         # AI services initialization
-        from ...ai.groq_service import GroqService
+        from ...ai.groq_service import get_groq_service
         from ...integrations.faceit_client import FaceitAPIClient
 
         # Use GroqService for AI-powered recommendations in demo analysis
-        self.ai_service = GroqService()
+        self.ai_service = get_groq_service()
         self.faceit_client = FaceitAPIClient()
         self.demo_coach_model = DemoCoachModel()
 
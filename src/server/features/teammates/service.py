@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 
 from ...database.models import TeammateProfile as TeammateProfileDB, User
 from .models import TeammateProfile, PlayerStats, TeammatePreferences
-from ...ai.groq_service import GroqService
+from ...ai.groq_service import get_groq_service
 from ...integrations.faceit_client import FaceitAPIClient
 import logging
 
@@ -18,7 +18,7 @@ class TeammateService:
     """Service for teammate search and preference management."""
 
     def __init__(self) -> None:
-        self.ai = GroqService()
+        self.ai = get_groq_service()
         self.faceit_client = FaceitAPIClient()
 
     async def ensure_profile_from_faceit(
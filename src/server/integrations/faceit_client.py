@@ -3,6 +3,7 @@ Faceit API Client
 Client for Faceit API integration
 """
 import aiohttp
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, cast
 import logging
 from ..config.settings import settings
@@ -288,3 +289,13 @@ class FaceitAPIClient:
                 "Matches": "150"
             }
         }
+
+
+@lru_cache(maxsize=1)
+def get_faceit_client() -> FaceitAPIClient:
+    """Process-wide FaceitAPIClient built from the current settings.
+
+    Tests that change the API key should call
+    ``get_faceit_client.cache_clear()`` afterwards.
+    """
+    return FaceitAPIClient()
@@ -1,14 +1,17 @@
 """Main FastAPI application entry point."""
 
+import asyncio
 import logging
 import os
 import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from prometheus_client import generate_latest, Counter
 
+from .ai.groq_service import close_http_client, get_groq_service
 from .config.settings import settings
 from .core.logging import setup_logging
 from .core.sentry import init_sentry, capture_exception
@@ -16,7 +19,8 @@ from .core.telemetry import init_telemetry
 from .middleware.logging_middleware import StructuredLoggingMiddleware
 from .middleware.security_middleware import SecurityMiddleware
 from .middleware.cache_middleware import CacheMiddleware
-from .auth.routes import router as auth_router
+from .auth.http import close_http as close_auth_http, warmup_http as warmup_auth_http
+from .auth.routes import STEAM_OPENID_URL, router as auth_router
 from .auth.dependencies import get_current_active_user
 from .auth.schemas import UserResponse
 from .database.models import User
@@ -96,7 +100,23 @@ class ApiPrefixStripMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the LLM and Steam connection pools in the background; startup does not wait
+    warmup_tasks = [
+        asyncio.create_task(get_groq_service().warmup()),
+        asyncio.create_task(warmup_auth_http(STEAM_OPENID_URL)),
+    ]
+    yield
+    for task in warmup_tasks:
+        task.cancel()
+    # Release pooled keep-alive connections to the LLM provider and auth hosts
+    await close_http_client()
+    await close_auth_http()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.APP_TITLE,
     version=settings.APP_VERSION,
     debug=False,
@@ -4,7 +4,7 @@ Request rate limiting
 """
 import time
 import logging
-from typing import Dict, Tuple
+from typing import Any, Dict, Tuple
 from fastapi import Request, HTTPException
 from collections import defaultdict
 from prometheus_client import Counter
@@ -29,6 +29,33 @@ RATE_LIMIT_BANS_TOTAL = Counter(
 )
 
 
+# Counts a violation for every (counter, ban) key pair in KEYS and, if any
+# counter reached the threshold, sets all ban keys; returns the highest count.
+# One round-trip instead of INCR/EXPIRE/SETEX per key, and no window in which
+# a counter exists without its expiry.
+_REGISTER_VIOLATION_LUA = """
+local window = tonumber(ARGV[1])
+local threshold = tonumber(ARGV[2])
+local ban_ttl = tonumber(ARGV[3])
+local max_count = 0
+for i = 1, #KEYS, 2 do
+    local count = redis.call('INCR', KEYS[i])
+    if count == 1 then
+        redis.call('EXPIRE', KEYS[i], window)
+    end
+    if count > max_count then
+        max_count = count
+    end
+end
+if max_count >= threshold then
+    for i = 2, #KEYS, 2 do
+        redis.call('SET', KEYS[i], '1', 'EX', ban_ttl)
+    end
+end
+return max_count
+"""
+
+
 class RateLimiter:
     """Rate limiter for API protection"""
 
@@ -44,6 +71,10 @@ class RateLimiter:
             cache_service.redis_client if getattr(cache_service, "enabled", False) else None
         )
 
+        # register_script() result, tied to the client it was created for
+        self._violation_script: Any = None
+        self._violation_script_client: Any = None
+
         # Request storage: {ip: [(timestamp, count)]}
         self.minute_requests: Dict[str, list] = defaultdict(list)
         self.hour_requests: Dict[str, list] = defaultdict(list)
@@ -167,28 +198,28 @@ class RateLimiter:
             return
 
         try:
-            max_count = 0
-
-            ip_key = f"rate:viol:ip:{client_ip}"
-            ip_count = await self.redis_client.incr(ip_key)
-            if ip_count == 1:
-                await self.redis_client.expire(ip_key, settings.RATE_LIMIT_BAN_WINDOW_SECONDS)
-            max_count = max(max_count, ip_count)
-
-            user_key = None
-            user_count = None
+            keys = [f"rate:viol:ip:{client_ip}", f"rate:ban:ip:{client_ip}"]
             if user_id is not None:
-                user_key = f"rate:viol:user:{user_id}"
-                user_count = await self.redis_client.incr(user_key)
-                if user_count == 1:
-                    await self.redis_client.expire(user_key, settings.RATE_LIMIT_BAN_WINDOW_SECONDS)
-                max_count = max(max_count, user_count)
+                keys += [f"rate:viol:user:{user_id}", f"rate:ban:user:{user_id}"]
+
+            # The script object sends EVALSHA and reloads the script on NOSCRIPT
+            if self._violation_script_client is not self.redis_client:
+                self._violation_script = self.redis_client.register_script(
+                    _REGISTER_VIOLATION_LUA
+                )
+                self._violation_script_client = self.redis_client
+            max_count = int(
+                await self._violation_script(
+                    keys=keys,
+                    args=[
+                        settings.RATE_LIMIT_BAN_WINDOW_SECONDS,
+                        settings.RATE_LIMIT_BAN_THRESHOLD,
+                        settings.RATE_LIMIT_BAN_TTL_SECONDS,
+                    ],
+                )
+            )
 
             if max_count >= settings.RATE_LIMIT_BAN_THRESHOLD:
-                ban_ttl = settings.RATE_LIMIT_BAN_TTL_SECONDS
-                await self.redis_client.setex(f"rate:ban:ip:{client_ip}", ban_ttl, "1")
-                if user_id is not None:
-                    await self.redis_client.setex(f"rate:ban:user:{user_id}", ban_ttl, "1")
                 logger.warning(
                     "Rate limit autoban applied: ip=%s user_id=%s violations=%s",
                     client_ip,
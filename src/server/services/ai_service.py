@@ -2,7 +2,7 @@
 import logging
 from typing import Dict, List, Any
 
-from ..ai.groq_service import GroqService
+from ..ai.groq_service import get_groq_service
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +11,7 @@ class AIService:
     """AI analysis service with enhanced rule-based analysis"""
 
     def __init__(self):
-        self.groq_service = GroqService()
+        self.groq_service = get_groq_service()
         logger.info("AI Service initialized")
 
     async def analyze_player_with_ai(
@@ -2,12 +2,17 @@
 import logging
 import asyncio
 import os
+from datetime import timedelta
 from typing import Dict, Any
 
 from celery import Task
 from fastapi import UploadFile
+from sqlalchemy import delete
 
 from .celery_app import celery_app
+from .core.timeutil import utcnow
+from .database.connection import SessionLocal
+from .database.models import UserSession
 from .features.demo_analyzer.service import DemoAnalyzer
 
 logger = logging.getLogger(__name__)
@@ -236,6 +241,39 @@ def cleanup_old_data_task(self, days: int = 30) -> Dict:
         return {"status": "failed", "error": str(exc)}
 
 
+@celery_app.task
+def cleanup_expired_sessions_task(grace_days: int = 7) -> Dict:
+    """
+    Delete refresh sessions that expired more than ``grace_days`` ago
+
+    Keeps user_sessions (and its active-session index) small; expired rows
+    can never be refreshed again.
+
+    Returns:
+        Cleanup stats
+    """
+    try:
+        cutoff = utcnow() - timedelta(days=grace_days)
+        db = SessionLocal()
+        try:
+            deleted = db.execute(
+                delete(UserSession).where(UserSession.expires_at < cutoff)
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+
+        logger.info(f"Expired sessions removed: {deleted}")
+        return {
+            "status": "completed",
+            "deleted_sessions": deleted
+        }
+
+    except Exception as exc:
+        logger.exception(f"Session cleanup failed: {exc}")
+        return {"status": "failed", "error": str(exc)}
+
+
 @celery_app.task
 def check_subscription_expiry_task() -> Dict:
     """
@@ -17,7 +17,7 @@ from src.server.config.settings import Settings
 from src.server.database import Base
 from src.server.database.connection import get_db
 from src.server.main import app as fastapi_app
-from src.server.auth.dependencies import get_current_user
+from src.server.auth.dependencies import _email_cache, _user_cache, get_current_user
 
 
 # ============================================
@@ -66,6 +66,10 @@ def test_db_engine(test_db_url):
 @pytest.fixture
 def db_session(test_db_engine):
     """Сессия тестовой БД с rollback после каждого теста"""
+    # Пользователи из откатанных тестов не должны оставаться в кэше
+    _user_cache.clear()
+    _email_cache.clear()
+
     # Создаем соединение и сессию
     connection = test_db_engine.connect()
     transaction = connection.begin()
@@ -75,8 +79,11 @@ def db_session(test_db_engine):
     def override_get_db():
         yield session
 
-    # Патчим на время теста
-    with patch("src.server.database.connection.get_db", override_get_db):
+    # Патчим на время теста; фоновые задачи auth открывают свои сессии
+    # через SessionLocal, поэтому направляем их в то же соединение
+    with patch("src.server.database.connection.get_db", override_get_db), patch(
+        "src.server.auth.routes.SessionLocal", sessionmaker(bind=connection)
+    ):
         yield session
 
     # Откатываем транзакцию и закрываем соединение
@@ -4,14 +4,17 @@ Covers additional branches in register/login, Faceit callback guards,
 Steam login, and Steam link/unlink endpoints.
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
 
 import pytest
+from sqlalchemy.orm import sessionmaker
 
+from src.server.auth import http as auth_http
 from src.server.auth import routes as auth_routes
-from src.server.auth.security import get_password_hash
+from src.server.auth.security import get_password_hash, hash_refresh_token
 from src.server.config.settings import settings
-from src.server.database.models import User, UserSession
+from src.server.database.models import TeammateProfile, User, UserSession
 from src.server.services.captcha_service import captcha_service
 import src.server.integrations.faceit_client as faceit_client_module
 
@@ -154,6 +157,39 @@ class TestAuthRoutesExtended:
         assert response.status_code == 401
         assert response.json()["detail"] == "Incorrect email or password"
 
+    def test_login_accepts_json_body_and_rejects_malformed_json(
+        self, test_client, db_session, monkeypatch
+    ):
+        """JSON logins work; an unparsable body is a 400, not a server error."""
+
+        monkeypatch.setattr(captcha_service, "is_enabled", lambda: False)
+
+        email = "jsonlogin@example.com"
+        user = User(
+            email=email,
+            username="jsonlogin",
+            hashed_password=get_password_hash("password123"),
+            is_active=True,
+            created_at=datetime.utcnow(),
+        )
+        db_session.add(user)
+        db_session.commit()
+
+        response = test_client.post(
+            "/auth/login",
+            json={"email": email, "password": "password123"},
+        )
+        assert response.status_code == 200
+        assert response.json()["token_type"] == "bearer"
+
+        response = test_client.post(
+            "/auth/login",
+            content=b"{not json",
+            headers={"content-type": "application/json"},
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Missing email or password"
+
     def test_faceit_callback_missing_code_or_state_returns_400(self, test_client):
         """Faceit callback should require both code and state."""
 
@@ -216,17 +252,22 @@ class TestAuthRoutesExtended:
             async def __aexit__(self, exc_type, exc, tb):  # noqa: D401, ANN001
                 return False
 
-            async def json(self):  # noqa: D401
+            async def json(self, loads=None):  # noqa: D401, ARG002
                 return self._json_data
 
             async def text(self):  # noqa: D401
                 return self._text_data
 
         class _FakeSession:
+            closed = False
+
             def __init__(self, *args, **kwargs) -> None:  # noqa: ANN001
                 self._post_response = _FakeResponse(200, {"access_token": "faceit-access-token"}, "ok")
                 self._get_response = _FakeResponse(200, userinfo, "ok")
 
+            async def close(self) -> None:  # noqa: D401
+                self.closed = True
+
             async def __aenter__(self):  # noqa: D401
                 return self
 
@@ -245,6 +286,8 @@ class TestAuthRoutesExtended:
                 self.kwargs = kwargs
 
         monkeypatch.setattr(auth_routes.aiohttp, "ClientSession", lambda *args, **kwargs: _FakeSession(*args, **kwargs))
+        # Drop any shared session opened earlier (e.g. by startup warmup)
+        monkeypatch.setattr(auth_http, "_session", None)
         monkeypatch.setattr(auth_routes.aiohttp, "BasicAuth", _FakeBasicAuth)
 
         class DummyFaceitClient:  # noqa: D401
@@ -252,6 +295,13 @@ class TestAuthRoutesExtended:
                 return {"games": {"cs2": {"faceit_elo": 2000, "skill_level": 7}}}
 
         monkeypatch.setattr(faceit_client_module, "FaceitAPIClient", DummyFaceitClient)
+        faceit_client_module.get_faceit_client.cache_clear()
+        auth_routes._faceit_player_cache.clear()
+        monkeypatch.setattr(
+            auth_routes,
+            "SessionLocal",
+            sessionmaker(bind=db_session.get_bind()),
+        )
 
         response = test_client.get(
             "/auth/faceit/callback?code=abc&state=dummy-state",
@@ -274,6 +324,19 @@ class TestAuthRoutesExtended:
         assert user.last_login is not None
         assert user.login_count == 1
 
+        # Teammate profile is synced by a background task after the redirect
+        profile = (
+            db_session.query(TeammateProfile)
+            .filter(TeammateProfile.user_id == user.id)
+            .first()
+        )
+        assert profile is not None
+        assert profile.elo == 2000
+        assert profile.level == 7
+        # The Data API lookup is cached for repeat logins
+        assert auth_routes._faceit_player_cache.get(userinfo["nickname"]) is not None
+        faceit_client_module.get_faceit_client.cache_clear()
+
         set_cookie = response.headers.get("set-cookie") or ""
         assert "access_token=" in set_cookie
 
@@ -315,6 +378,24 @@ class TestAuthRoutesExtended:
                 self.storage[key] = value
                 self.expires[key] = ttl
 
+            def register_script(self, script: str):  # noqa: ARG002
+                """Emulate the violation Lua script with the stub's own commands."""
+
+                async def run(keys, args):
+                    window, threshold, ban_ttl = (int(a) for a in args)
+                    max_count = 0
+                    for counter_key in keys[::2]:
+                        count = await self.incr(counter_key)
+                        if count == 1:
+                            await self.expire(counter_key, window)
+                        max_count = max(max_count, count)
+                    if max_count >= threshold:
+                        for ban_key in keys[1::2]:
+                            await self.setex(ban_key, ban_ttl, "1")
+                    return max_count
+
+                return run
+
         dummy = _DummyRedis()
 
         monkeypatch.setattr(auth_routes.rate_limiter, "redis_client", dummy)
@@ -376,6 +457,12 @@ class TestAuthRoutesExtended:
         assert location is not None
         assert "steamcommunity.com/openid/login" in location
 
+        query = parse_qs(urlsplit(location).query)
+        assert query["openid.mode"] == ["checkid_setup"]
+        assert query["openid.return_to"] == [
+            f"{settings.WEBSITE_URL.rstrip('/')}/api/auth/steam/callback"
+        ]
+
     def test_steam_login_captcha_invalid_still_redirects_fail_open(self, test_client, monkeypatch):
         """Steam login should still redirect when CAPTCHA verification fails (fail-open)."""
 
@@ -616,6 +703,48 @@ class TestAuthRoutesExtended:
         assert len(revoked) == 1
         assert len(active) == 1
 
+    def test_refresh_rejects_revoked_session_even_if_still_indexed(
+        self, test_client, db_session, monkeypatch
+    ):
+        """A stale Redis index entry must not revive a revoked refresh session."""
+
+        user = User(
+            email="stale-index@example.com",
+            username="stale_index_user",
+            hashed_password="x",
+            is_active=True,
+            created_at=datetime.utcnow(),
+        )
+        db_session.add(user)
+        db_session.commit()
+        user_id = user.id
+
+        raw_refresh = "stale-refresh-token"
+        db_session.add(
+            UserSession(
+                user_id=user_id,
+                token_hash=hash_refresh_token(raw_refresh),
+                created_at=datetime.utcnow(),
+                expires_at=datetime.utcnow() + timedelta(days=1),
+                revoked_at=datetime.utcnow(),
+            )
+        )
+        db_session.commit()
+
+        async def indexed(token_hash):  # noqa: ARG001
+            return user_id
+
+        monkeypatch.setattr(auth_routes.session_store, "lookup", indexed)
+        test_client.cookies.set("refresh_token", raw_refresh)
+
+        response = test_client.post("/auth/refresh")
+
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid or expired refresh token"
+        assert (
+            db_session.query(UserSession).filter(UserSession.user_id == user_id).count() == 1
+        )
+
 
     def test_refresh_with_invalid_cookie_returns_401_and_clears_cookie(
         self,
@@ -759,3 +888,100 @@ class TestAuthRoutesExtended:
         # access_token cookie should be set
         set_cookie = response.headers.get("set-cookie") or ""
         assert "access_token=" in set_cookie
+
+    def test_make_unique_username_skips_taken_suffixes(self, db_session):
+        """Unique username helper should skip every taken "<base>_<n>" variant."""
+
+        for i, name in enumerate(["player", "player_1", "player_2", "playerX_3", "player%"]):
+            db_session.add(
+                User(
+                    email=f"u{i}@example.com",
+                    username=name,
+                    hashed_password="x",
+                    is_active=True,
+                    created_at=datetime.utcnow(),
+                )
+            )
+        db_session.commit()
+
+        assert auth_routes._make_unique_username(db_session, "player") == "player_3"
+        assert auth_routes._make_unique_username(db_session, "fresh") == "fresh"
+        assert auth_routes._make_unique_username(db_session, "play%") == "play%"
+
+        owner = db_session.query(User).filter(User.username == "player").first()
+        assert (
+            auth_routes._make_unique_username(db_session, "player", exclude_user_id=owner.id)
+            == "player"
+        )
+
+    def test_faceit_claims_from_id_token_requires_valid_claims(self):
+        """Profile claims are taken from the id_token only when complete and valid."""
+
+        import jwt
+
+        key = "k" * 32
+        valid = {
+            "iss": auth_routes.FACEIT_ID_TOKEN_ISSUER,
+            "aud": "client-1",
+            "exp": datetime.utcnow() + timedelta(minutes=5),
+            "sub": "faceit-guid-1",
+            "nickname": "Nick",
+            "email": "n@example.com",
+        }
+
+        def encode(**overrides):
+            payload = {k: v for k, v in {**valid, **overrides}.items() if v is not None}
+            return jwt.encode(payload, key, algorithm="HS256")
+
+        claims = auth_routes._faceit_claims_from_id_token(encode(), "client-1")
+        assert claims is not None
+        assert claims["sub"] == "faceit-guid-1"
+        assert claims["nickname"] == "Nick"
+
+        rejected = [
+            encode(nickname=None),
+            encode(aud="other-client"),
+            encode(aud=None),
+            encode(iss="https://evil.example.com"),
+            encode(exp=datetime.utcnow() - timedelta(minutes=5)),
+            encode(exp=None),
+            "not-a-jwt",
+            None,
+        ]
+        for token in rejected:
+            assert auth_routes._faceit_claims_from_id_token(token, "client-1") is None
+
+    @pytest.mark.asyncio
+    async def test_fetch_steam_persona_name_is_cached_per_steam_id(self, monkeypatch):
+        """Repeat logins reuse the persona name instead of calling Steam again."""
+
+        calls = []
+
+        class _FakeResponse:
+            status = 200
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):  # noqa: ANN002
+                return False
+
+            async def json(self, loads=None):  # noqa: ANN001, ARG002
+                return {"response": {"players": [{"personaname": "Persona"}]}}
+
+        class _FakeSession:
+            def get(self, url, params=None):  # noqa: ANN001, ARG002
+                calls.append(params["steamids"])
+                return _FakeResponse()
+
+        async def fake_get_http():
+            return _FakeSession()
+
+        monkeypatch.setattr(settings, "STEAM_WEB_API_KEY", "key", raising=False)
+        monkeypatch.setattr(auth_routes, "get_http", fake_get_http)
+        auth_routes._steam_persona_cache.clear()
+
+        assert await auth_routes.fetch_steam_persona_name("7656") == "Persona"
+        assert await auth_routes.fetch_steam_persona_name("7656") == "Persona"
+        assert calls == ["7656"]
+        auth_routes._steam_persona_cache.clear()
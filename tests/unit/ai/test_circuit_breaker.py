@@ -0,0 +1,54 @@
+import pytest
+
+import src.server.ai.circuit_breaker as circuit_breaker
+from src.server.ai.circuit_breaker import CircuitBreaker, get_circuit_breaker
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", fake.monotonic)
+    return fake
+
+
+def test_breaker_opens_after_consecutive_failures(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(fail_max=2, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_probe_closes_or_reopens(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=30)
+    breaker.record_failure()
+
+    clock.now = 31.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 62.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+
+
+def test_get_circuit_breaker_disabled_and_shared() -> None:
+    assert get_circuit_breaker("provider-a") is None
+
+    breaker = get_circuit_breaker("provider-a", fail_max=3, reset_timeout=10)
+    assert breaker is not None
+    assert breaker is get_circuit_breaker("provider-a", fail_max=3, reset_timeout=10)
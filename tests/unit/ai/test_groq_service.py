@@ -1,8 +1,11 @@
 from typing import Any, Dict
+import asyncio
 import json
 
+import httpx
 import pytest
 
+import src.server.ai.circuit_breaker as circuit_breaker
 import src.server.ai.groq_service as groq_module
 from src.server.ai.groq_service import GroqService
 from src.server.config.settings import settings
@@ -35,7 +38,16 @@ def _force_openrouter(
     monkeypatch.setattr(settings, "GROQ_API_KEY", None, raising=False)
 
 
-class DummyResponse:
+@pytest.fixture(autouse=True)
+def _no_retry_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "GROQ_RETRY_BASE_DELAY", 0.0, raising=False)
+    groq_module._response_cache.clear()
+    circuit_breaker._breakers.clear()
+
+
+class DummyTransport:
+    """Records outgoing LLM requests and replies with a canned response."""
+
     def __init__(
         self,
         status: int = 200,
@@ -43,46 +55,33 @@ class DummyResponse:
         text_data: str = "",
     ) -> None:
         self.status = status
-        self._json_data = json_data or {}
+        self._json_data = json_data
         self._text_data = text_data
-
-    async def __aenter__(self) -> "DummyResponse":
-        return self
-
-    async def __aexit__(self, exc_type, exc, tb) -> None:
-        return None
-
-    async def json(self) -> Dict[str, Any]:
-        return self._json_data
-
-    async def text(self) -> str:
-        return self._text_data
-
-
-class DummySession:
-    def __init__(self, response: DummyResponse) -> None:
-        self._response = response
         self.last_url: str | None = None
         self.last_headers: Dict[str, Any] | None = None
         self.last_json: Dict[str, Any] | None = None
+        self.calls = 0
 
-    async def __aenter__(self) -> "DummySession":
-        return self
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        self.last_url = str(request.url)
+        self.last_headers = dict(request.headers)
+        self.last_json = json.loads(request.content or b"{}")
+        if self._json_data is not None:
+            return httpx.Response(self.status, json=self._json_data)
+        return httpx.Response(self.status, text=self._text_data)
 
-    async def __aexit__(self, exc_type, exc, tb) -> None:
-        return None
 
-    def post(
-        self,
-        url: str,
-        *,
-        headers: Dict[str, Any] | None = None,
-        json: Dict[str, Any] | None = None,
-    ) -> DummyResponse:
-        self.last_url = url
-        self.last_headers = headers
-        self.last_json = json
-        return self._response
+def _install_transport(
+    monkeypatch: pytest.MonkeyPatch,
+    transport: DummyTransport,
+) -> None:
+    monkeypatch.setattr(
+        groq_module,
+        "_build_http_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(transport.handler)),
+    )
+    monkeypatch.setattr(groq_module, "_http_client", None)
 
 
 class TestGroqServiceHelpers:
@@ -105,6 +104,37 @@ class TestGroqServiceHelpers:
             assert "daily_exercises" in plan
             assert "estimated_time" in plan
 
+    def test_default_training_plan_returns_independent_copies(self) -> None:
+        service = GroqService(api_key="dummy")
+
+        plan = service._get_default_training_plan("en")
+        plan["focus_areas"].append("mutated")
+
+        assert "mutated" not in service._get_default_training_plan("en")
+        assert service._get_default_training_plan("en-US") == (
+            service._get_default_training_plan("en")
+        )
+
+    def test_build_analysis_prompt_drops_key_rounds_over_budget(self) -> None:
+        stats: Dict[str, Any] = {
+            "kd_ratio": 1.0,
+            "key_moments": [
+                {"round": n, "description": "x" * 400} for n in range(1, 4)
+            ],
+        }
+
+        full = GroqService(api_key="dummy")._build_analysis_prompt(
+            stats, match_history=[], language="en"
+        )
+        trimmed = GroqService(
+            api_key="dummy", max_prompt_tokens=300
+        )._build_analysis_prompt(stats, match_history=[], language="en")
+
+        assert "round 3:" in full
+        assert "round 3:" not in trimmed
+        assert "round 1:" in trimmed
+        assert len(trimmed) < len(full)
+
     def test_build_analysis_prompt_includes_extra_context(self) -> None:
         service = GroqService(api_key="dummy")
         stats: Dict[str, Any] = {
@@ -131,6 +161,50 @@ class TestGroqServiceHelpers:
         assert "Ключевые раунды" in prompt_ru
         assert "Key rounds" in prompt_en
 
+    def test_extract_json_object_handles_fences_and_surrounding_text(self) -> None:
+        fenced = "```json\n{\"a\": 1}\n```"
+        noisy = 'Here is the plan: {"a": {"b": "}"}} Hope this helps {x}'
+
+        assert groq_module._extract_json_object(fenced) == {"a": 1}
+        assert groq_module._extract_json_object(noisy) == {"a": {"b": "}"}}
+        assert groq_module._extract_json_object("no json here") is None
+
+    def test_body_parts_are_cached_and_wrap_user_content(self) -> None:
+        service = GroqService(api_key="dummy")
+
+        prefix, suffix = service._body_parts("system", 0.5, 300)
+        assert service._body_parts("system", 0.5, 300) == (prefix, suffix)
+
+        user_content = 'Привет "игрок"\n'
+        body = prefix + json.dumps(user_content, ensure_ascii=False).encode() + suffix
+        assert json.loads(body) == {
+            "model": service.model,
+            "messages": [
+                {"role": "system", "content": "system"},
+                {"role": "user", "content": user_content},
+            ],
+            "temperature": 0.5,
+            "max_tokens": 300,
+        }
+
+    def test_strip_demo_defaults_drops_empty_values_and_caps_rounds(self) -> None:
+        demo_input = {
+            "language": "en",
+            "player": {"nickname": "p1", "team": "", "steam_id": None},
+            "aggregate_stats": {"kills": 0, "deaths": 12},
+            "flags": [],
+            "key_rounds": [{"round": i, "events": []} for i in range(15)],
+        }
+
+        stripped = groq_module._strip_demo_defaults(demo_input)
+
+        assert stripped["player"] == {"nickname": "p1"}
+        assert stripped["aggregate_stats"] == {"kills": 0, "deaths": 12}
+        assert "flags" not in stripped
+        assert len(stripped["key_rounds"]) == groq_module._MAX_DEMO_KEY_ROUNDS
+        assert stripped["key_rounds"][0] == {"round": 0}
+        assert groq_module._extract_json_object("{broken") is None
+
 
 class TestGroqServiceWithoutApiKey:
     async def test_analyze_player_performance_without_api_key(
@@ -231,14 +305,8 @@ class TestGroqServiceWithHttpMock:
                 {"message": {"content": "analysis result"}},
             ],
         }
-        dummy_response = DummyResponse(status=200, json_data=response_json)
-        dummy_session = DummySession(dummy_response)
-
-        monkeypatch.setattr(
-            groq_module.aiohttp,
-            "ClientSession",
-            lambda: dummy_session,
-        )
+        dummy_session = DummyTransport(status=200, json_data=response_json)
+        _install_transport(monkeypatch, dummy_session)
 
         service = GroqService(api_key=None)
 
@@ -256,27 +324,98 @@ class TestGroqServiceWithHttpMock:
         assert "analysis result" in result
         assert dummy_session.last_url == service.groq_base_url
         assert dummy_session.last_headers is not None
-        assert dummy_session.last_headers.get("Authorization") == (
+        assert dummy_session.last_headers.get("authorization") == (
             "Bearer test-openrouter-key"
         )
-        assert dummy_session.last_headers.get("HTTP-Referer") == "https://example.com"
-        assert dummy_session.last_headers.get("X-Title") == "Test App"
+        assert dummy_session.last_headers.get("http-referer") == "https://example.com"
+        assert dummy_session.last_headers.get("x-title") == "Test App"
         assert dummy_session.last_json is not None
         assert dummy_session.last_json.get("model") == service.model
+        assert dummy_session.last_json["max_tokens"] == 350
+        assert dummy_session.last_json["stop"] == ["\n\n5.", "```"]
 
-    async def test_analyze_player_performance_http_error(
+        await service.analyze_player_performance(
+            stats={}, match_history=[], language="en", detail_level="short"
+        )
+        assert dummy_session.last_json["max_tokens"] == 200
+
+    async def test_analyze_player_performance_caches_successful_result(
         self,
         monkeypatch: pytest.MonkeyPatch,
     ) -> None:
         _force_openrouter(monkeypatch, api_key="test-openrouter-key")
-        dummy_response = DummyResponse(status=500, text_data="server error")
-        dummy_session = DummySession(dummy_response)
+        dummy_session = DummyTransport(
+            status=200,
+            json_data={"choices": [{"message": {"content": "Cached"}}]},
+        )
+        _install_transport(monkeypatch, dummy_session)
+
+        service = GroqService(api_key=None)
+
+        first = await service.analyze_player_performance(
+            stats={"kd_ratio": 1.2345}, match_history=[], language="en"
+        )
+        # Equal after quantization to 2 decimals -> served from cache
+        second = await GroqService(api_key=None).analyze_player_performance(
+            stats={"kd_ratio": 1.2349}, match_history=[], language="en"
+        )
+        await service.analyze_player_performance(
+            stats={"kd_ratio": 1.2345}, match_history=[], language="ru"
+        )
+
+        assert first == second == "Cached"
+        assert dummy_session.calls == 2
+
+    async def test_concurrent_identical_training_plans_share_one_request(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_openrouter(monkeypatch, api_key="plan-key")
+        plan_body: Dict[str, Any] = {
+            "daily_exercises": [
+                {"name": "aim", "duration": "30m", "description": "do aim"},
+            ],
+            "weekly_goals": ["improve aim"],
+            "estimated_time": "4 weeks",
+        }
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(
+                200,
+                json={"choices": [{"message": {"content": json.dumps(plan_body)}}]},
+            )
 
         monkeypatch.setattr(
-            groq_module.aiohttp,
-            "ClientSession",
-            lambda: dummy_session,
+            groq_module,
+            "_build_http_client",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
         )
+        monkeypatch.setattr(groq_module, "_http_client", None)
+
+        service = GroqService(api_key=None)
+
+        first, second = await asyncio.gather(
+            service.generate_training_plan({"kd_ratio": 1.0}, ["aim"], "en"),
+            GroqService(api_key=None).generate_training_plan(
+                {"kd_ratio": 1.0}, ["aim"], "en"
+            ),
+        )
+
+        assert first == second == plan_body
+        assert first is not second
+        assert len(calls) == 1
+        assert groq_module._inflight == {}
+
+    async def test_analyze_player_performance_http_error(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_openrouter(monkeypatch, api_key="test-openrouter-key")
+        dummy_session = DummyTransport(status=500, text_data="server error")
+        _install_transport(monkeypatch, dummy_session)
 
         service = GroqService(api_key=None)
 
@@ -287,6 +426,99 @@ class TestGroqServiceWithHttpMock:
         )
 
         assert result == "Error analyzing performance: 500"
+        assert dummy_session.calls == service.retry_attempts
+
+    async def test_open_circuit_skips_provider_until_reset(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_openrouter(monkeypatch, api_key="test-openrouter-key")
+        monkeypatch.setattr(settings, "GROQ_BREAKER_FAIL_MAX", 1, raising=False)
+        dummy_session = DummyTransport(status=503, text_data="unavailable")
+        _install_transport(monkeypatch, dummy_session)
+
+        service = GroqService(api_key=None)
+
+        first = await service.analyze_player_performance({"kd_ratio": 1.0}, [], "en")
+        assert first == "Error analyzing performance: 503"
+        attempts = dummy_session.calls
+
+        plan = await service.generate_training_plan({"kd_ratio": 1.0}, ["aim"], "en")
+
+        assert plan == service._get_default_training_plan("en")
+        assert dummy_session.calls == attempts
+
+    async def test_analyze_player_performance_retries_transient_errors(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_openrouter(monkeypatch, api_key="test-openrouter-key")
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "0"}, text="slow down"),
+            httpx.Response(503, text="unavailable"),
+            httpx.Response(
+                200,
+                json={"choices": [{"message": {"content": "Recovered"}}]},
+            ),
+        ]
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return responses[len(calls) - 1]
+
+        monkeypatch.setattr(
+            groq_module,
+            "_build_http_client",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        monkeypatch.setattr(groq_module, "_http_client", None)
+
+        service = GroqService(api_key=None)
+
+        result = await service.analyze_player_performance(
+            stats={},
+            match_history=[],
+            language="en",
+        )
+
+        assert result == "Recovered"
+        assert len(calls) == 3
+
+    async def test_analyze_player_performance_retries_after_timeout(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_openrouter(monkeypatch, api_key="test-openrouter-key")
+        monkeypatch.setattr(settings, "GROQ_REQUEST_TIMEOUT", 0.05, raising=False)
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if len(calls) == 1:
+                await asyncio.sleep(1)
+            return httpx.Response(
+                200,
+                json={"choices": [{"message": {"content": "On time"}}]},
+            )
+
+        monkeypatch.setattr(
+            groq_module,
+            "_build_http_client",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        monkeypatch.setattr(groq_module, "_http_client", None)
+
+        service = GroqService(api_key=None)
+
+        result = await service.analyze_player_performance(
+            stats={},
+            match_history=[],
+            language="en",
+        )
+
+        assert result == "On time"
+        assert len(calls) == 2
 
     async def test_generate_demo_coach_report_success_with_code_fences(
         self,
@@ -304,7 +536,7 @@ class TestGroqServiceWithHttpMock:
         }
         fenced_content = "```json\n" + json.dumps(report_body) + "\n```"
 
-        dummy_response = DummyResponse(
+        dummy_session = DummyTransport(
             status=200,
             json_data={
                 "choices": [
@@ -312,13 +544,7 @@ class TestGroqServiceWithHttpMock:
                 ],
             },
         )
-        dummy_session = DummySession(dummy_response)
-
-        monkeypatch.setattr(
-            groq_module.aiohttp,
-            "ClientSession",
-            lambda: dummy_session,
-        )
+        _install_transport(monkeypatch, dummy_session)
 
         service = GroqService(api_key=None)
 
@@ -344,7 +570,7 @@ class TestGroqServiceWithHttpMock:
         }
         content = json.dumps(plan_body)
 
-        dummy_response = DummyResponse(
+        dummy_session = DummyTransport(
             status=200,
             json_data={
                 "choices": [
@@ -352,13 +578,54 @@ class TestGroqServiceWithHttpMock:
                 ],
             },
         )
-        dummy_session = DummySession(dummy_response)
+        _install_transport(monkeypatch, dummy_session)
+
+        service = GroqService(api_key=None)
+
+        result = await service.generate_training_plan(
+            player_stats={"kd_ratio": 1.0},
+            focus_areas=["aim"],
+            language="en",
+        )
+
+        assert result == plan_body
+
+    async def test_generate_training_plan_streams_until_object_closes(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_openrouter(monkeypatch, api_key="plan-key")
+        plan_body: Dict[str, Any] = {
+            "daily_exercises": [
+                {"name": "aim {x}", "duration": "30m", "description": 'do "aim"'},
+            ],
+            "weekly_goals": ["improve aim"],
+            "estimated_time": "4 weeks",
+        }
+        text = "```json\n" + json.dumps(plan_body) + "\n``` and some chatter"
+        chunks = [text[i : i + 7] for i in range(0, len(text), 7)]
+        events = "".join(
+            "data: "
+            + json.dumps({"choices": [{"delta": {"content": chunk}}]})
+            + "\n\n"
+            for chunk in chunks
+        )
+        captured: Dict[str, Any] = {}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            captured["body"] = json.loads(request.content)
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=events.encode(),
+            )
 
         monkeypatch.setattr(
-            groq_module.aiohttp,
-            "ClientSession",
-            lambda: dummy_session,
+            groq_module,
+            "_build_http_client",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
         )
+        monkeypatch.setattr(groq_module, "_http_client", None)
 
         service = GroqService(api_key=None)
 
@@ -368,8 +635,140 @@ class TestGroqServiceWithHttpMock:
             language="en",
         )
 
+        assert captured["body"]["stream"] is True
         assert result == plan_body
 
+    async def test_groq_training_plan_uses_fast_model(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_remote_without_key(monkeypatch)
+        monkeypatch.setattr(settings, "GROQ_API_KEY", "groq-key", raising=False)
+        monkeypatch.setattr(settings, "GROQ_MODEL", "big-model", raising=False)
+        monkeypatch.setattr(settings, "GROQ_FAST_MODEL", "small-model", raising=False)
+        dummy_session = DummyTransport(status=200, json_data={"choices": []})
+        _install_transport(monkeypatch, dummy_session)
+
+        service = GroqService(api_key=None)
+        await service.generate_training_plan({"kd_ratio": 1.0}, ["aim"], "en")
+
+        assert dummy_session.last_json is not None
+        assert dummy_session.last_json["model"] == "small-model"
+        assert service._model_for("analysis") == "big-model"
+
+    async def test_stream_player_performance_yields_deltas_and_caches(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_openrouter(monkeypatch, api_key="stream-key")
+        chunks = ["1. Aim", " is solid", "\n2. Work on utility"]
+        events = "".join(
+            "data: "
+            + json.dumps({"choices": [{"delta": {"content": chunk}}]})
+            + "\n\n"
+            for chunk in chunks
+        ) + "data: [DONE]\n\n"
+        calls = {"n": 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls["n"] += 1
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=events.encode(),
+            )
+
+        monkeypatch.setattr(
+            groq_module,
+            "_build_http_client",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        monkeypatch.setattr(groq_module, "_http_client", None)
+
+        service = GroqService(api_key=None)
+        stats = {"kd_ratio": 1.3}
+
+        streamed = [
+            delta async for delta in service.stream_player_performance(stats, [], "en")
+        ]
+        assert streamed == chunks
+
+        # The assembled text is cached for the non-streaming path
+        assert await service.analyze_player_performance(stats, [], "en") == "".join(chunks)
+        assert calls["n"] == 1
+
+    async def test_stream_player_performance_interrupted_stream_is_not_cached(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_openrouter(monkeypatch, api_key="stream-key")
+        first = "data: " + json.dumps({"choices": [{"delta": {"content": "1. Aim"}}]}) + "\n\n"
+
+        class _BrokenStream(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                yield first.encode()
+                raise httpx.ReadTimeout("read timed out")
+
+        def handler(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                stream=_BrokenStream(),
+            )
+
+        monkeypatch.setattr(
+            groq_module,
+            "_build_http_client",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        monkeypatch.setattr(groq_module, "_http_client", None)
+        groq_module._response_cache.clear()
+
+        service = GroqService(api_key=None)
+        stats = {"kd_ratio": 0.7}
+
+        streamed = [
+            delta async for delta in service.stream_player_performance(stats, [], "en")
+        ]
+        assert streamed[0] == "1. Aim"
+        assert streamed[-1].startswith("Error analyzing performance:")
+        assert len(groq_module._response_cache) == 0
+
+    async def test_generate_training_plan_invalid_schema_returns_default(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        _force_openrouter(monkeypatch, api_key="plan-key")
+
+        content = json.dumps({"daily_exercises": "run 5km", "weekly_goals": []})
+        dummy_session = DummyTransport(
+            status=200,
+            json_data={"choices": [{"message": {"content": content}}]},
+        )
+        _install_transport(monkeypatch, dummy_session)
+
+        service = GroqService(api_key=None)
+
+        result = await service.generate_training_plan(
+            player_stats={"kd_ratio": 1.0},
+            focus_areas=["aim"],
+            language="en",
+        )
+
+        assert result == service._get_default_training_plan("en")
+
+    def test_validate_teammate_scores_drops_invalid_entries(self) -> None:
+        scores = groq_module._validate_teammate_scores(
+            {
+                "1": {"score": "0.7", "summary": "ok"},
+                "2": {"score": "high"},
+                "3": "not an object",
+            }
+        )
+
+        assert scores == {"1": {"score": 0.7, "summary": "ok"}}
+
     async def test_describe_teammate_matches_success_parses_json(
         self,
         monkeypatch: pytest.MonkeyPatch,
@@ -384,7 +783,7 @@ class TestGroqServiceWithHttpMock:
         }
         content = json.dumps(body)
 
-        dummy_response = DummyResponse(
+        dummy_session = DummyTransport(
             status=200,
             json_data={
                 "choices": [
@@ -392,13 +791,7 @@ class TestGroqServiceWithHttpMock:
                 ],
             },
         )
-        dummy_session = DummySession(dummy_response)
-
-        monkeypatch.setattr(
-            groq_module.aiohttp,
-            "ClientSession",
-            lambda: dummy_session,
-        )
+        _install_transport(monkeypatch, dummy_session)
 
         service = GroqService(api_key=None)
 
@@ -408,3 +801,39 @@ class TestGroqServiceWithHttpMock:
         )
 
         assert result == body
+        assert dummy_session.last_json is not None
+        assert dummy_session.last_json["response_format"] == {"type": "json_object"}
+        assert dummy_session.last_json["provider"] == {"sort": "latency"}
+
+
+async def test_warmup_requests_models_endpoint(monkeypatch: pytest.MonkeyPatch) -> None:
+    _force_openrouter(monkeypatch, api_key="warm-key")
+    dummy_session = DummyTransport(status=200, json_data={"data": []})
+    _install_transport(monkeypatch, dummy_session)
+
+    await GroqService(api_key=None).warmup()
+
+    assert dummy_session.last_url == "https://openrouter.ai/api/v1/models"
+    assert dummy_session.last_headers is not None
+    assert dummy_session.last_headers["authorization"] == "Bearer warm-key"
+
+
+def test_get_groq_service_returns_shared_instance() -> None:
+    groq_module.get_groq_service.cache_clear()
+    try:
+        service = groq_module.get_groq_service()
+        assert groq_module.get_groq_service() is service
+    finally:
+        groq_module.get_groq_service.cache_clear()
+
+
+async def test_close_http_client_closes_shared_client() -> None:
+    client = groq_module._get_http_client()
+    assert groq_module._get_http_client() is client
+
+    await groq_module.close_http_client()
+
+    assert client.is_closed
+    assert groq_module._http_client is None
+    assert groq_module._get_http_client() is not client
+    await groq_module.close_http_client()
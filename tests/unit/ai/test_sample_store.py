@@ -0,0 +1,59 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+import src.server.ai.sample_store as sample_store
+
+
+def _read_lines(path: Path) -> list:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_append_sample_lines_writes_one_line_per_record(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(sample_store, "AI_SAMPLES_DIR", str(tmp_path))
+
+    sample_store.append_sample_lines(
+        [
+            json.dumps({"task": "analysis", "language": "en", "input": {}, "output": "a"}),
+            json.dumps({"task": "teammates", "language": "ru", "input": {}, "output": {}}),
+        ]
+    )
+
+    lines = _read_lines(tmp_path / sample_store.AI_SAMPLES_FILENAME)
+    assert [line["task"] for line in lines] == ["analysis", "teammates"]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_sample_line_flushes_batch_in_background(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(sample_store, "AI_SAMPLES_DIR", str(tmp_path))
+    batches: list = []
+    original = sample_store.append_sample_lines
+
+    def recording_append(lines):
+        batches.append(len(lines))
+        original(lines)
+
+    monkeypatch.setattr(sample_store, "append_sample_lines", recording_append)
+
+    for idx in range(3):
+        sample_store.enqueue_sample_line(
+            json.dumps({"task": "analysis", "input": {"i": idx}})
+        )
+
+    # Nothing is written synchronously on the event loop
+    assert not (tmp_path / sample_store.AI_SAMPLES_FILENAME).exists()
+
+    await asyncio.sleep(0)
+    await asyncio.gather(*list(sample_store._flush_futures))
+
+    assert batches == [3]
+    lines = _read_lines(tmp_path / sample_store.AI_SAMPLES_FILENAME)
+    assert [line["input"]["i"] for line in lines] == [0, 1, 2]
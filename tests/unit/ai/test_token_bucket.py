@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+import src.server.ai.token_bucket as token_bucket
+from src.server.ai.token_bucket import AsyncTokenBucket, get_model_rate_limiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(token_bucket.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(token_bucket.asyncio, "sleep", fake.sleep)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_waits_for_refill(clock: FakeClock) -> None:
+    bucket = AsyncTokenBucket(rate_per_s=2.0, burst=2)
+
+    await bucket.acquire()
+    await bucket.acquire()
+    assert clock.sleeps == []
+
+    await bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+@pytest.mark.asyncio
+async def test_bucket_clamps_oversized_requests_to_burst(clock: FakeClock) -> None:
+    bucket = AsyncTokenBucket(rate_per_s=10.0, burst=100)
+
+    await bucket.acquire(100)
+    await bucket.acquire(1000)
+
+    assert clock.sleeps == [pytest.approx(10.0)]
+
+
+@pytest.mark.asyncio
+async def test_get_model_rate_limiter_disabled_and_shared() -> None:
+    assert get_model_rate_limiter("model-a") is None
+
+    limiter = get_model_rate_limiter("model-a", rpm=30, tpm=6000)
+    assert limiter is get_model_rate_limiter("model-a", rpm=30, tpm=6000)
+    assert limiter is not None
+    assert limiter.requests is not None and limiter.tokens is not None
+
+
+def test_shared_limiter_survives_event_loop_change() -> None:
+    limiter = get_model_rate_limiter("model-loops", rpm=60000, tpm=0)
+    assert limiter is not None and limiter.requests is not None
+    limiter.requests._tokens = 0.0
+
+    async def contend() -> None:
+        # Concurrent waiters bind the lock to the running loop
+        await asyncio.gather(*(limiter.acquire(1) for _ in range(3)))
+
+    asyncio.run(contend())
+    asyncio.run(contend())
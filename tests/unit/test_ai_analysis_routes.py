@@ -343,3 +343,29 @@ def test_parse_analysis_extracts_sections_and_items() -> None:
     assert "Bad economy decisions" in weaknesses
     assert "Practice eco rounds" in recs
     assert "Watch pro demos" in recs
+
+
+@pytest.mark.asyncio
+async def test_analyze_player_stream_reports_midstream_failure(client, monkeypatch):
+    """An error after streaming started becomes an error event, then [DONE]."""
+
+    class BrokenGroq:
+        async def stream_player_performance(self, *args, **kwargs):  # noqa: ARG002
+            yield "1. Aim"
+            raise RuntimeError("provider went away")
+
+    monkeypatch.setattr(ai_routes, "FaceitAPIClient", lambda: DummyFaceitClient())
+    monkeypatch.setattr(ai_routes, "get_groq_service", lambda: BrokenGroq())
+
+    response = client.post(
+        "/ai/analyze-player/stream",
+        json={"player_nickname": "TestNick"},
+    )
+
+    assert response.status_code == 200
+    events = [line for line in response.text.split("\n\n") if line]
+    assert events == [
+        'data: {"delta":"1. Aim"}',
+        'data: {"error":"Failed to analyze player"}',
+        "data: [DONE]",
+    ]
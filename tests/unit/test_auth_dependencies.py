@@ -27,6 +27,9 @@ from src.server.database.models import Base, User
 @pytest.fixture
 def db_session():
     """In-memory SQLite session bound to app models Base."""
+    # Every test starts a fresh database whose user ids repeat
+    auth_deps._user_cache.clear()
+    auth_deps._email_cache.clear()
     engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
     Base.metadata.create_all(engine)
     SessionLocal = sessionmaker(bind=engine)
@@ -359,3 +362,113 @@ async def test_get_current_admin_user_sets_state(db_session):
 
     assert result is admin_user
     assert request.state.user_id == str(admin_user.id)
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_serves_cached_user_until_updated(
+    monkeypatch, client, db_session
+):
+    user = create_user(db_session, email="cached@example.com")
+    user_id = user.id
+
+    def fake_decode(token: str):  # noqa: ARG001
+        return {"sub": user_id}
+
+    monkeypatch.setattr(auth_deps, "decode_access_token", fake_decode)
+    headers = {"Authorization": "Bearer testtoken"}
+    assert client.get("/me", headers=headers).status_code == 200
+
+    def fail_query(*args, **kwargs):
+        raise AssertionError("user should come from the cache")
+
+    with monkeypatch.context() as m:
+        m.setattr(db_session, "query", fail_query)
+        response = client.get("/me", headers=headers)
+    assert response.json() == {"id": user_id, "email": "cached@example.com"}
+
+    user.email = "changed@example.com"
+    db_session.commit()
+
+    assert user_id not in auth_deps._user_cache
+
+
+def test_load_user_by_email_caches_hits_and_misses(db_session, monkeypatch) -> None:
+    user = create_user(db_session, email="login@example.com")
+    user_id = user.id
+
+    assert auth_deps.load_user_by_email(db_session, "login@example.com").id == user_id
+    assert auth_deps.load_user_by_email(db_session, "nobody@example.com") is None
+    assert "hashed_password" not in auth_deps._email_cache.get("login@example.com")
+
+    def fail_query(*args, **kwargs):
+        raise AssertionError("lookup should come from the cache")
+
+    with monkeypatch.context() as m:
+        m.setattr(db_session, "query", fail_query)
+        cached = auth_deps.load_user_by_email(db_session, "login@example.com")
+        assert cached.id == user_id
+        assert "hashed_password" in cached.__dict__
+        assert cached.hashed_password == "hashed"
+        assert auth_deps.load_user_by_email(db_session, "nobody@example.com") is None
+
+    # ORM writes evict both the old and the new address
+    user = db_session.get(User, user_id)
+    user.email = "nobody@example.com"
+    db_session.commit()
+
+    assert "login@example.com" not in auth_deps._email_cache
+    assert "nobody@example.com" not in auth_deps._email_cache
+    assert auth_deps.load_user_by_email(db_session, "nobody@example.com").id == user_id
+
+
+@pytest.mark.asyncio
+async def test_get_current_active_user_values_reads_cache_without_orm(
+    monkeypatch, db_session
+) -> None:
+    user = create_user(db_session, email="values@example.com")
+    user_id = user.id
+    inactive = create_user(db_session, email="off@example.com", username="off", is_active=False)
+    inactive_id = inactive.id
+
+    def fake_decode(token: str):
+        return {"sub": user_id if token == "active" else inactive_id}
+
+    monkeypatch.setattr(auth_deps, "decode_access_token", fake_decode)
+    request = Request({"type": "http", "headers": [], "state": {}})
+
+    values = await auth_deps.get_current_active_user_values(request, "active", db_session)
+    assert values["email"] == "values@example.com"
+    assert request.state.user_id == str(user_id)
+
+    def fail_query(*args, **kwargs):
+        raise AssertionError("values should come from the cache")
+
+    def fail_merge(*args, **kwargs):
+        raise AssertionError("no User should be attached to the session")
+
+    with monkeypatch.context() as m:
+        m.setattr(db_session, "query", fail_query)
+        m.setattr(db_session, "merge", fail_merge)
+        values = await auth_deps.get_current_active_user_values(request, "active", db_session)
+    assert values["id"] == user_id
+
+    with pytest.raises(HTTPException) as exc:
+        await auth_deps.get_current_active_user_values(request, "inactive", db_session)
+    assert exc.value.status_code == 400
+
+
+def test_record_login_evicts_both_auth_caches(db_session, monkeypatch) -> None:
+    from src.server.auth import routes as auth_routes
+
+    user = create_user(db_session, email="activity@example.com")
+    user_id = user.id
+    auth_deps.load_user(db_session, user_id)
+    auth_deps.load_user_by_email(db_session, "activity@example.com")
+    monkeypatch.setattr(auth_routes, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(db_session, "close", lambda: None)
+
+    auth_routes._record_login(user_id, "activity@example.com")
+
+    assert user_id not in auth_deps._user_cache
+    assert "activity@example.com" not in auth_deps._email_cache
+    assert auth_deps.load_user_by_email(db_session, "activity@example.com").login_count == 1
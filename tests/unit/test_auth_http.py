@@ -0,0 +1,52 @@
+import pytest
+
+from src.server.auth import http as auth_http
+
+
+class _FakeResponse:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):  # noqa: ANN001
+        return False
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.urls: list[str] = []
+
+    def head(self, url: str):
+        self.urls.append(url)
+        if "down" in url:
+            raise OSError("connection refused")
+        return _FakeResponse()
+
+
+@pytest.mark.asyncio
+async def test_warmup_http_touches_every_url_and_ignores_failures(monkeypatch) -> None:
+    session = _FakeSession()
+
+    async def fake_get_http():
+        return session
+
+    monkeypatch.setattr(auth_http, "get_http", fake_get_http)
+
+    await auth_http.warmup_http("https://down.example", "https://up.example")
+
+    assert session.urls == ["https://down.example", "https://up.example"]
+
+
+@pytest.mark.asyncio
+async def test_get_http_reuses_session_until_closed() -> None:
+    first = await auth_http.get_http()
+    try:
+        assert await auth_http.get_http() is first
+    finally:
+        await auth_http.close_http()
+
+    assert first.closed
+    second = await auth_http.get_http()
+    try:
+        assert second is not first
+    finally:
+        await auth_http.close_http()
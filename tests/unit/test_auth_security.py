@@ -20,6 +20,51 @@ def test_verify_password_invalid_hash_returns_false() -> None:
     assert security.verify_password("password", "not-a-bcrypt-hash") is False
 
 
+def test_verify_password_unusable_hash_skips_bcrypt(monkeypatch) -> None:
+    def fail_checkpw(*args, **kwargs):  # noqa: ARG001
+        raise AssertionError("bcrypt must not run for unusable hashes")
+
+    monkeypatch.setattr(security.bcrypt, "checkpw", fail_checkpw)
+
+    assert security.verify_password("!", security.UNUSABLE_PASSWORD_HASH) is False
+    assert security.verify_password("password", "") is False
+
+
+@pytest.mark.asyncio
+async def test_password_async_helpers_roundtrip() -> None:
+    hashed = await security.get_password_hash_async("test-password-123")
+
+    assert await security.verify_password_async("test-password-123", hashed) is True
+    assert await security.verify_password_async("wrong-password", hashed) is False
+
+
+@pytest.mark.asyncio
+async def test_verify_password_async_without_hash_skips_bcrypt_by_default(monkeypatch) -> None:
+    def fail_checkpw(*args, **kwargs):  # noqa: ARG001
+        raise AssertionError("bcrypt must not run for unknown accounts")
+
+    monkeypatch.setattr(security.settings, "AUTH_DUMMY_PASSWORD_CHECK", False, raising=False)
+    monkeypatch.setattr(security.bcrypt, "checkpw", fail_checkpw)
+
+    assert await security.verify_password_async("password", None) is False
+
+
+@pytest.mark.asyncio
+async def test_verify_password_async_without_hash_runs_dummy_check_if_enabled(monkeypatch) -> None:
+    monkeypatch.setattr(security.settings, "AUTH_DUMMY_PASSWORD_CHECK", True, raising=False)
+    calls = []
+    real_checkpw = security.bcrypt.checkpw
+
+    def tracking_checkpw(password, hashed):
+        calls.append(hashed)
+        return real_checkpw(password, hashed)
+
+    monkeypatch.setattr(security.bcrypt, "checkpw", tracking_checkpw)
+
+    assert await security.verify_password_async("password", None) is False
+    assert len(calls) == 1
+
+
 def test_long_password_is_truncated_for_bcrypt_but_still_verifies() -> None:
     # bcrypt uses only first 72 bytes; our helper truncates explicitly
     long_password = "a" * 100
@@ -44,6 +89,20 @@ def test_create_and_decode_access_token_roundtrip() -> None:
     assert "exp" in payload
 
 
+def test_decode_access_token_caches_verified_payload(monkeypatch) -> None:
+    token = security.create_access_token({"sub": "7"}, expires_delta=timedelta(minutes=5))
+    assert security.decode_access_token(token) is not None
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token should be served from cache")
+
+    monkeypatch.setattr(security.jwt, "decode", fail_decode)
+
+    payload = security.decode_access_token(token)
+    assert payload is not None
+    assert payload["sub"] == "7"
+
+
 def test_decode_access_token_invalid_returns_none() -> None:
     assert security.decode_access_token("this-is-not-a-jwt") is None
 
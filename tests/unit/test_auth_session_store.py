@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pytest
+
+from src.server.auth import session_store
+from src.server.core.timeutil import utcnow
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self.data[key] = value
+        self.ttls[key] = ex or 0
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+
+class BrokenRedis:
+    async def get(self, key: str):  # noqa: ARG002
+        raise ConnectionError("redis is down")
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(session_store.cache_service, "enabled", True, raising=False)
+    monkeypatch.setattr(session_store.cache_service, "redis_client", client, raising=False)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_remember_lookup_and_forget(fake_redis) -> None:
+    expires_at = utcnow() + timedelta(days=1)
+
+    await session_store.remember("abc", 42, expires_at)
+
+    assert await session_store.lookup("abc") == 42
+    ttl = fake_redis.ttls["auth:rs:abc"]
+    assert 86_000 < ttl <= 86_400
+
+    await session_store.forget("abc")
+    assert await session_store.lookup("abc") is None
+
+
+@pytest.mark.asyncio
+async def test_expired_sessions_are_not_indexed(fake_redis) -> None:
+    await session_store.remember("old", 1, utcnow() - timedelta(seconds=1))
+
+    assert fake_redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_database(monkeypatch) -> None:
+    monkeypatch.setattr(session_store.cache_service, "enabled", True, raising=False)
+    monkeypatch.setattr(session_store.cache_service, "redis_client", BrokenRedis(), raising=False)
+
+    assert await session_store.lookup("abc") is None
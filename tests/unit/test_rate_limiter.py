@@ -38,6 +38,24 @@ class DummyRedis:
         self.storage[key] = value
         self.expires[key] = ttl
 
+    def register_script(self, script: str):  # noqa: ARG002
+        """Emulate the violation Lua script with the stub's own commands."""
+
+        async def run(keys, args):
+            window, threshold, ban_ttl = (int(a) for a in args)
+            max_count = 0
+            for counter_key in keys[::2]:
+                count = await self.incr(counter_key)
+                if count == 1:
+                    await self.expire(counter_key, window)
+                max_count = max(max_count, count)
+            if max_count >= threshold:
+                for ban_key in keys[1::2]:
+                    await self.setex(ban_key, ban_ttl, "1")
+            return max_count
+
+        return run
+
 
 class FailingRedis:
     """Redis stub that always fails on incr to simulate connection errors."""
@@ -199,3 +217,47 @@ async def test_rate_limiter_redis_error_falls_back_to_memory(monkeypatch):
     assert "1 requests per minute" in exc.value.detail
     # Redis client should be disabled after the first error
     assert limiter.redis_client is None
+
+
+@pytest.mark.asyncio
+async def test_register_violation_uses_one_cached_script_call(monkeypatch):
+    """Violations for IP and user go through a single script call, registered once."""
+    limiter = RateLimiter()
+
+    dummy = DummyRedis()
+    registered: list[str] = []
+    calls: list[list[str]] = []
+    make_script = dummy.register_script
+
+    def register_script(script: str):
+        registered.append(script)
+        run = make_script(script)
+
+        async def tracked(keys, args):
+            calls.append(list(keys))
+            return await run(keys, args)
+
+        return tracked
+
+    dummy.register_script = register_script  # type: ignore[method-assign]
+    limiter.redis_client = dummy
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_BAN_ENABLED", True, raising=False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BAN_THRESHOLD", 2, raising=False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BAN_WINDOW_SECONDS", 60, raising=False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BAN_TTL_SECONDS", 300, raising=False)
+
+    await limiter._register_violation_and_maybe_ban("10.0.0.1", "7")
+    assert dummy.storage == {}
+
+    await limiter._register_violation_and_maybe_ban("10.0.0.1", "7")
+
+    assert len(registered) == 1
+    assert calls[0] == [
+        "rate:viol:ip:10.0.0.1",
+        "rate:ban:ip:10.0.0.1",
+        "rate:viol:user:7",
+        "rate:ban:user:7",
+    ]
+    assert dummy.expires["rate:viol:ip:10.0.0.1"] == 60
+    assert set(dummy.storage) == {"rate:ban:ip:10.0.0.1", "rate:ban:user:7"}
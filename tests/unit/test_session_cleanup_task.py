@@ -0,0 +1,44 @@
+"""Unit tests for the expired refresh session cleanup task"""
+
+from datetime import timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+import src.server.tasks as tasks
+from src.server.core.timeutil import utcnow
+from src.server.database.models import Base, User, UserSession
+
+
+def test_cleanup_expired_sessions_task_deletes_only_old_sessions(monkeypatch) -> None:
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    monkeypatch.setattr(tasks, "SessionLocal", SessionLocal)
+
+    now = utcnow()
+    with SessionLocal() as db:
+        user = User(email="cleanup@example.com", username="cleanup", hashed_password="!")
+        db.add(user)
+        db.flush()
+        for name, expires_at in (
+            ("long-expired", now - timedelta(days=10)),
+            ("recently-expired", now - timedelta(days=1)),
+            ("active", now + timedelta(days=1)),
+        ):
+            db.add(
+                UserSession(
+                    user_id=user.id,
+                    token_hash=name,
+                    created_at=now - timedelta(days=30),
+                    expires_at=expires_at,
+                )
+            )
+        db.commit()
+
+    result = tasks.cleanup_expired_sessions_task(grace_days=7)
+
+    assert result == {"status": "completed", "deleted_sessions": 1}
+    with SessionLocal() as db:
+        remaining = db.scalars(select(UserSession.token_hash)).all()
+        assert sorted(remaining) == ["active", "recently-expired"]
@@ -0,0 +1,46 @@
+import pytest
+
+import src.server.core.fast_json as fast_json
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_round_trip_with_and_without_orjson(
+    monkeypatch: pytest.MonkeyPatch,
+    use_orjson: bool,
+) -> None:
+    if not use_orjson:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    elif fast_json.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    class Opaque:
+        def __str__(self) -> str:
+            return "opaque"
+
+    record = {"task": "analysis", "text": "Привет", "extra": Opaque()}
+
+    encoded = fast_json.dumps_bytes(record)
+
+    assert b"\n" not in encoded
+    assert fast_json.loads(encoded) == {
+        "task": "analysis",
+        "text": "Привет",
+        "extra": "opaque",
+    }
+    assert fast_json.loads(fast_json.dumps(record)) == fast_json.loads(encoded)
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_sort_keys_gives_canonical_encoding(
+    monkeypatch: pytest.MonkeyPatch,
+    use_orjson: bool,
+) -> None:
+    if not use_orjson:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    elif fast_json.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    a = fast_json.dumps_bytes({"b": 1, "a": {"d": 2, "c": 3}}, sort_keys=True)
+    b = fast_json.dumps_bytes({"a": {"c": 3, "d": 2}, "b": 1}, sort_keys=True)
+
+    assert a == b == b'{"a":{"c":3,"d":2},"b":1}'
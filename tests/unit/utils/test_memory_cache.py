@@ -0,0 +1,52 @@
+import pytest
+
+import src.server.core.memory_cache as memory_cache
+from src.server.core.memory_cache import TTLCache
+
+
+def test_ttl_cache_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(memory_cache.time, "monotonic", lambda: now[0])
+    cache: TTLCache = TTLCache(maxsize=10, ttl=5)
+
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1
+
+    now[0] += 6
+    assert cache.get("a") is None
+    assert "b" in cache
+    assert cache.pop("b") == 2
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_survives_concurrent_access_from_threads() -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache: TTLCache = TTLCache(maxsize=64, ttl=0.0001)
+
+    def hammer(worker: int) -> None:
+        for i in range(2000):
+            key = (worker + i) % 100
+            cache.set(key, i)
+            cache.get(key)
+            cache.pop((key + 1) % 100)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        # list() re-raises any KeyError from the workers
+        list(pool.map(hammer, range(8)))
+
+    assert len(cache) <= 64